@@ -0,0 +1,71 @@
+"""Shared Rust source cache for the AI helpers.
+
+`map_codebase`, `extract_key_types` and `generate_enhanced_c4_component` all
+need the `.rs` files under a crate's `src/`. Walking and reading them once per
+project (instead of once per helper) keeps file opens at N rather than 3N.
+"""
+
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# Build output and tooling directories that never hold project sources
+SKIP_DIRS = frozenset({".git", "target", "node_modules", ".cargo", "__pycache__"})
+
+
+def rust_sources(project_path: Path) -> tuple[tuple[Path, bytes], ...]:
+    """Return `(path, content)` pairs for every `.rs` file under `project_path/src`.
+
+    The tree is walked on every call, but files are only read again when a
+    file's mtime or size has changed or the set of files differs. Only the
+    two most recent projects are kept in memory. Content is returned
+    undecoded.
+    """
+    return _read_sources(_list_sources(project_path / "src"))
+
+
+def _list_sources(src_path: Path) -> tuple[tuple[Path, int, int], ...]:
+    """Walk `src_path` and fingerprint every Rust file as `(path, mtime_ns, size)`."""
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(src_path):
+        # Prune in place so os.walk never descends into build artifacts
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            if not filename.endswith(".rs"):
+                continue
+            path = Path(dirpath, filename)
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((path, st.st_mtime_ns, st.st_size))
+    
+    entries.sort()
+    return tuple(entries)
+
+
+@functools.lru_cache(maxsize=2)
+def _read_sources(
+    files: tuple[tuple[Path, int, int], ...]
+) -> tuple[tuple[Path, bytes], ...]:
+    """Read every fingerprinted file once (the fingerprints are the cache key)."""
+    rs_files = [path for path, _, _ in files]
+    # File reads release the GIL, so a thread pool overlaps the I/O waits
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        contents = list(pool.map(_read_bytes, rs_files))
+    
+    return tuple(
+        (rs_file, content)
+        for rs_file, content in zip(rs_files, contents)
+        if content is not None
+    )
+
+
+def _read_bytes(path: Path) -> bytes | None:
+    """Read a file, returning None if it cannot be read."""
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
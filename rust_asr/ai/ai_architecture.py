@@ -1,32 +1,71 @@
 """AI-enhanced architecture analysis using Gemini."""
 
 import asyncio
+import hashlib
+import io
 import json
 import re
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
+
+import aiofiles
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    import toml as tomllib
+
+# orjson is optional - it serializes large results much faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 from rust_asr.ai import llm, mapper, prompts
+from rust_asr.ai._cache import rust_sources
 from rust_asr.analysis import architecture
 
 
-async def refine_architecture_style(
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize to indented UTF-8 JSON, stringifying unknown types."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(obj, indent=2, default=str).encode()
+
+
+def _json_loads(data: str) -> Any:
+    """Parse JSON text."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Inferred ADRs per project and codebase-context hash
+ADR_CACHE_DIR = llm.CACHE_DIR / "adrs"
+
+# Dependency name fragments that hint at how a project is deployed
+DEPLOYMENT_KEYWORDS = [
+    "tokio", "axum", "actix", "rocket", "warp",  # web
+    "clap", "structopt",  # CLI
+    "diesel", "sqlx", "sea-orm",  # database
+    "redis", "kafka", "rabbitmq",  # messaging
+    "k8s", "docker",  # container
+]
+_DEPLOYMENT_DEP_RE = re.compile("|".join(map(re.escape, DEPLOYMENT_KEYWORDS)))
+
+
+def _style_prompt_fields(
     project_path: Path,
     static_analysis: dict[str, Any],
-) -> dict[str, Any]:
-    """Use AI to refine and validate detected architecture styles.
-    
-    Args:
-        project_path: Path to the Rust project
-        static_analysis: Results from static architecture analysis
-        
-    Returns:
-        Refined architecture assessment with AI insights
-    """
-    client = llm.get_client()
-    
-    # Prepare context
-    workspace_info = json.dumps(static_analysis.get("workspace", {}), indent=2)
+) -> dict[str, str]:
+    """Format static analysis results for the style refinement prompts."""
+    workspace_info = _json_dumps(static_analysis.get("workspace", {})).decode()
     detected_styles = "\n".join(
         f"- {s.get('style', 'Unknown')} ({s.get('confidence', 0):.0%}): {s.get('description', '')}"
         for s in static_analysis.get("styles", [])
@@ -40,14 +79,57 @@ async def refine_architecture_style(
     deps = []
     for pkg in static_analysis.get("workspace", {}).get("packages", []):
         deps.extend(pkg.get("dependencies", []))
-    deps_str = ", ".join(set(deps[:20]))
+    deps_str = ", ".join(sorted(set(deps[:20])))
     
-    prompt = prompts.ARCHITECTURE_STYLE_REFINEMENT_PROMPT.format(
-        project_name=project_path.name,
-        workspace_info=workspace_info,
-        detected_styles=detected_styles,
-        communication_patterns=comm_patterns,
-        dependencies=deps_str,
+    return {
+        "project_name": project_path.name,
+        "workspace_info": workspace_info,
+        "detected_styles": detected_styles,
+        "communication_patterns": comm_patterns,
+        "dependencies": deps_str,
+    }
+
+
+def _parse_json_response(result: str) -> dict[str, Any] | None:
+    """Extract the JSON object from an LLM response, or None if there is none."""
+    # Decode from the first brace, which works with or without a ```json
+    # fence, then fall back to the fenced block
+    start = result.find("{")
+    if start != -1:
+        try:
+            parsed, _ = _JSON_DECODER.raw_decode(result, start)
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+    
+    try:
+        json_match = re.search(r'```json\s*(.*?)\s*```', result, re.DOTALL)
+        if json_match:
+            return _json_loads(json_match.group(1))
+    except (ValueError, AttributeError):
+        pass
+    
+    return None
+
+
+async def refine_architecture_style(
+    project_path: Path,
+    static_analysis: dict[str, Any],
+) -> dict[str, Any]:
+    """Use AI to refine and validate detected architecture styles.
+    
+    Args:
+        project_path: Path to the Rust project
+        static_analysis: Results from static architecture analysis
+        
+    Returns:
+        Refined architecture assessment with AI insights
+    """
+    client = llm.get_client()
+    
+    prompt = prompts.render_architecture_style_refinement(
+        **_style_prompt_fields(project_path, static_analysis)
     )
     
     system_prompt = (
@@ -58,57 +140,88 @@ async def refine_architecture_style(
     
     result = await client.generate(prompt, system_prompt, temperature=0.3)
     
-    # Parse JSON from response
-    try:
-        json_match = re.search(r'```json\s*(.*?)\s*```', result, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-    except (json.JSONDecodeError, AttributeError):
-        pass
-    
+    parsed = _parse_json_response(result)
+    if parsed is not None:
+        return parsed
     return {"raw_response": result, "parse_error": True}
 
 
+def _prep_adr_prompt(
+    project_path: Path,
+    patterns: list[dict[str, Any]] | None = None,
+) -> str:
+    """Map the codebase and build the ADR extraction prompt (blocking I/O)."""
+    return prompts.render_adr_extraction(
+        project_name=project_path.name,
+        codebase_context=mapper.map_codebase(project_path, max_tokens=50000),
+        patterns=_patterns_text(patterns),
+    )
+
+
+def _patterns_text(patterns: list[dict[str, Any]] | None) -> str:
+    """Format pre-detected patterns for a prompt."""
+    if patterns:
+        return "\n".join(
+            f"- {p['pattern']} ({p['confidence']}%)"
+            for p in patterns
+        )
+    return "No pre-detected patterns provided."
+
+
 async def extract_adrs(
     project_path: Path,
     patterns: list[dict[str, Any]] | None = None,
+    output_path: Path | None = None,
 ) -> str:
     """Use AI to infer ADRs from code patterns.
     
     Args:
         project_path: Path to the Rust project
         patterns: Optional pre-detected patterns
+        output_path: Optional file to stream the ADRs into as they are generated
         
     Returns:
         Markdown-formatted ADRs
     """
     client = llm.get_client()
     
-    # Map codebase
-    context = mapper.map_codebase(project_path, max_tokens=50000)
-    
-    # Format patterns
-    patterns_str = ""
-    if patterns:
-        patterns_str = "\n".join(
-            f"- {p['pattern']} ({p['confidence']}%)"
-            for p in patterns
-        )
-    else:
-        patterns_str = "No pre-detected patterns provided."
-    
-    prompt = prompts.ADR_EXTRACTION_PROMPT.format(
-        project_name=project_path.name,
-        codebase_context=context,
-        patterns=patterns_str,
-    )
+    prompt = await asyncio.to_thread(_prep_adr_prompt, project_path, patterns)
     
     system_prompt = (
         "You are an experienced Rust software architect who documents architectural decisions. "
         "Generate well-structured ADRs based on observable code patterns."
     )
     
-    return await client.generate(prompt, system_prompt, temperature=0.5, max_tokens=4096)
+    # Without explicit patterns the ADRs depend only on the codebase context,
+    # so reuse a previous result for the same context
+    cache_file = None
+    if patterns is None and client.use_cache:
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:16]
+        cache_file = ADR_CACHE_DIR / f"{project_path.name}-{digest}.md"
+        try:
+            adrs = cache_file.read_text()
+        except OSError:
+            pass
+        else:
+            if output_path:
+                output_path.write_text(adrs)
+            return adrs
+    
+    if output_path:
+        adrs = await _stream_to_file(
+            client.generate_stream(prompt, system_prompt, temperature=0.5, max_tokens=4096),
+            output_path,
+        )
+    else:
+        adrs = await client.generate(prompt, system_prompt, temperature=0.5, max_tokens=4096)
+    
+    if cache_file and adrs:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(adrs)
+        except OSError:
+            pass
+    return adrs
 
 
 async def generate_enhanced_c4_component(
@@ -142,13 +255,11 @@ async def generate_enhanced_c4_component(
     
     # Get module structure
     src_path = crate_path / "src"
-    module_structure = ""
-    if src_path.exists():
-        modules = []
-        for rs_file in sorted(src_path.rglob("*.rs")):
-            rel = rs_file.relative_to(crate_path)
-            modules.append(f"- {rel}")
-        module_structure = "\n".join(modules[:50])
+    modules = [
+        f"- {rs_file.relative_to(crate_path)}"
+        for rs_file, _ in rust_sources(crate_path)
+    ]
+    module_structure = "\n".join(modules[:50])
     
     # Get key types
     key_types = mapper.extract_key_types(crate_path)
@@ -172,7 +283,7 @@ async def generate_enhanced_c4_component(
         except Exception:
             pass
     
-    prompt = prompts.C4_COMPONENT_ENHANCED_PROMPT.format(
+    prompt = prompts.render_c4_component_enhanced(
         project_name=project_path.name,
         crate_name=crate_name,
         module_structure=module_structure or "No modules found",
@@ -188,76 +299,145 @@ async def generate_enhanced_c4_component(
     return await client.generate(prompt, system_prompt, temperature=0.3)
 
 
-async def analyze_deployment_model(
+def _deployment_prompt_fields(
     project_path: Path,
-) -> str:
-    """Analyze and infer the project's deployment model.
-    
-    Args:
-        project_path: Path to the Rust project
-        
-    Returns:
-        Markdown description of deployment model
-    """
-    client = llm.get_client()
-    
+    workspace: dict[str, Any] | None = None,
+) -> dict[str, str]:
+    """Collect workspace/Cargo.toml deployment evidence (blocking I/O)."""
     # Get workspace info
-    workspace = architecture.analyze_workspace(project_path)
+    if workspace is None:
+        workspace = architecture.analyze_workspace(project_path)
     
     # Extract features from Cargo.toml
     features = []
     binaries = []
-    deployment_deps = []
     
     cargo_toml = project_path / "Cargo.toml"
     if cargo_toml.exists():
         try:
-            content = cargo_toml.read_text()
-            # Simple feature extraction
-            if "[features]" in content:
-                feature_section = content.split("[features]")[1].split("\n[")[0]
-                for line in feature_section.split("\n"):
-                    if "=" in line:
-                        features.append(line.split("=")[0].strip())
-            
-            # Binary targets
-            if "[[bin]]" in content:
-                for match in re.finditer(r'name\s*=\s*"([^"]+)"', content):
-                    binaries.append(match.group(1))
+            data = tomllib.loads(cargo_toml.read_text())
+            features = list(data.get("features", {}).keys())
+            binaries = [b["name"] for b in data.get("bin", []) if "name" in b]
         except Exception:
             pass
     
-    # Check for deployment-related deps
-    deployment_keywords = [
-        "tokio", "axum", "actix", "rocket", "warp",  # web
-        "clap", "structopt",  # CLI
-        "diesel", "sqlx", "sea-orm",  # database
-        "redis", "kafka", "rabbitmq",  # messaging
-        "k8s", "docker",  # container
-    ]
-    
-    for pkg in workspace.get("packages", []):
-        for dep in pkg.get("dependencies", []):
-            # Dependencies are stored as strings
-            dep_name = dep.lower() if isinstance(dep, str) else dep.get("name", "").lower()
-            if any(kw in dep_name for kw in deployment_keywords):
-                deployment_deps.append(dep_name)
+    # Check for deployment-related deps; workspaces repeat the same deps across
+    # crates, so dedupe first and test each unique name once
+    dep_names = {
+        (dep if isinstance(dep, str) else dep.get("name", "")).lower()
+        for pkg in workspace.get("packages", [])
+        for dep in pkg.get("dependencies", [])
+    }
+    deployment_deps = sorted(d for d in dep_names if _DEPLOYMENT_DEP_RE.search(d))
     
-    prompt = prompts.DEPLOYMENT_MODEL_PROMPT.format(
+    return {
+        "features": ", ".join(features[:20]) or "None detected",
+        "binaries": ", ".join(binaries) or "Library only",
+        "deployment_deps": ", ".join(deployment_deps[:15]) or "None detected",
+    }
+
+
+def _prep_deployment_prompt(project_path: Path) -> str:
+    """Collect deployment evidence and build the deployment prompt (blocking I/O)."""
+    return prompts.render_deployment_model(
         project_name=project_path.name,
-        features=", ".join(features[:20]) or "None detected",
-        binaries=", ".join(binaries) or "Library only",
-        deployment_deps=", ".join(list(set(deployment_deps))[:15]) or "None detected",
+        **_deployment_prompt_fields(project_path),
     )
+
+
+async def analyze_deployment_model(
+    project_path: Path,
+    output_path: Path | None = None,
+) -> str:
+    """Analyze and infer the project's deployment model.
+    
+    Args:
+        project_path: Path to the Rust project
+        output_path: Optional file to stream the description into as it is generated
+        
+    Returns:
+        Markdown description of deployment model
+    """
+    client = llm.get_client()
+    
+    prompt = await asyncio.to_thread(_prep_deployment_prompt, project_path)
     
     system_prompt = (
         "You are a DevOps-aware Rust architect. "
         "Describe deployment models based on evidence from the codebase."
     )
     
+    if output_path:
+        return await _stream_to_file(
+            client.generate_stream(prompt, system_prompt, temperature=0.4),
+            output_path,
+        )
     return await client.generate(prompt, system_prompt, temperature=0.4)
 
 
+async def _stream_to_file(chunks: AsyncIterator[str], output_path: Path) -> str:
+    """Write streamed LLM output to a file as it arrives and return the full text."""
+    parts = []
+    async with aiofiles.open(output_path, "w") as f:
+        async for chunk in chunks:
+            parts.append(chunk)
+            await f.write(chunk)
+    return "".join(parts)
+
+
+def _prep_combined_prompt(
+    project_path: Path,
+    static_analysis: dict[str, Any],
+) -> str:
+    """Build the single-request style/ADR/deployment prompt (blocking I/O)."""
+    return prompts.render_combined_analysis(
+        **_style_prompt_fields(project_path, static_analysis),
+        codebase_context=mapper.map_codebase(project_path, max_tokens=50000),
+        patterns=_patterns_text(None),
+        **_deployment_prompt_fields(project_path, static_analysis.get("workspace")),
+    )
+
+
+async def combined_architecture_analysis(
+    project_path: Path,
+    static_analysis: dict[str, Any],
+) -> tuple[dict[str, Any], str, str] | None:
+    """Refine the style, infer ADRs and describe deployment in one LLM call.
+    
+    The shared context (workspace, dependencies, codebase map) is sent once
+    instead of once per sub-analysis.
+    
+    Args:
+        project_path: Path to the Rust project
+        static_analysis: Results from static architecture analysis
+        
+    Returns:
+        `(refined_style, adrs, deployment)`, or None if the response did not
+        contain the expected JSON object
+    """
+    client = llm.get_client()
+    
+    prompt = await asyncio.to_thread(_prep_combined_prompt, project_path, static_analysis)
+    
+    system_prompt = (
+        "You are a senior Rust software architect. "
+        "Provide accurate, evidence-based assessments grounded in the codebase. "
+        "Output valid JSON only."
+    )
+    
+    result = await client.generate(prompt, system_prompt, temperature=0.4, max_tokens=12000)
+    
+    parsed = _parse_json_response(result)
+    if (
+        parsed is None
+        or not isinstance(parsed.get("style"), dict)
+        or not isinstance(parsed.get("adrs"), str)
+        or not isinstance(parsed.get("deployment"), str)
+    ):
+        return None
+    return parsed["style"], parsed["adrs"], parsed["deployment"]
+
+
 async def full_ai_architecture_analysis(
     project_path: Path,
     output_dir: Path | None = None,
@@ -275,8 +455,9 @@ async def full_ai_architecture_analysis(
     
     # Run static analysis first
     workspace = architecture.analyze_workspace(project_path)
-    styles = architecture.detect_architecture_style(project_path)
-    comm_patterns = architecture.detect_communication_patterns(project_path)
+    sources = architecture.SourceCache.build(project_path)
+    styles = architecture.detect_architecture_style(project_path, sources)
+    comm_patterns = architecture.detect_communication_patterns(project_path, sources)
     
     static_analysis = {
         "workspace": workspace,
@@ -284,12 +465,27 @@ async def full_ai_architecture_analysis(
         "communication_patterns": comm_patterns,
     }
     
-    # Run AI enhancements in parallel
-    refined_style, adrs, deployment = await asyncio.gather(
-        refine_architecture_style(project_path, static_analysis),
-        extract_adrs(project_path),
-        analyze_deployment_model(project_path),
-    )
+    adrs_path = deployment_path = None
+    if output_dir:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        adrs_path = output_dir / "inferred_adrs.md"
+        deployment_path = output_dir / "deployment_model.md"
+    
+    # One request covers style, ADRs and deployment; fall back to the three
+    # separate calls (run in parallel, streaming to disk) if it can't be parsed
+    combined = await combined_architecture_analysis(project_path, static_analysis)
+    if combined is not None:
+        refined_style, adrs, deployment = combined
+        if output_dir:
+            adrs_path.write_text(adrs)
+            deployment_path.write_text(deployment)
+    else:
+        refined_style, adrs, deployment = await asyncio.gather(
+            refine_architecture_style(project_path, static_analysis),
+            extract_adrs(project_path, output_path=adrs_path),
+            analyze_deployment_model(project_path, output_path=deployment_path),
+        )
     
     results = {
         "project_name": project_path.name,
@@ -301,19 +497,8 @@ async def full_ai_architecture_analysis(
     
     # Save if output directory specified
     if output_dir:
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
         # Save JSON summary
-        (output_dir / "ai_analysis.json").write_text(
-            json.dumps(results, indent=2, default=str)
-        )
-        
-        # Save ADRs
-        (output_dir / "inferred_adrs.md").write_text(adrs)
-        
-        # Save deployment model
-        (output_dir / "deployment_model.md").write_text(deployment)
+        (output_dir / "ai_analysis.json").write_bytes(_json_dumps(results))
         
         # Generate full report
         report = _generate_report(results)
@@ -324,38 +509,45 @@ async def full_ai_architecture_analysis(
 
 def _generate_report(results: dict[str, Any]) -> str:
     """Generate markdown report from analysis results."""
-    lines = [
+    buf = io.StringIO()
+    
+    def w(*lines: str) -> None:
+        for line in lines:
+            buf.write(line)
+            buf.write("\n")
+    
+    w(
         f"# AI Architecture Analysis: {results['project_name']}",
         "",
         "## Architecture Style Assessment",
         "",
-    ]
+    )
     
     refined = results.get("ai_refined_style", {})
     if not refined.get("parse_error"):
-        lines.extend([
+        w(
             f"**Primary Style**: {refined.get('primary_style', 'Unknown')} "
             f"({refined.get('primary_confidence', 0)}% confidence)",
             "",
             "### Evidence",
             "",
-        ])
+        )
         for evidence in refined.get("primary_evidence", []):
-            lines.append(f"- {evidence}")
+            w(f"- {evidence}")
         
-        lines.extend(["", "### Secondary Styles", ""])
+        w("", "### Secondary Styles", "")
         for style in refined.get("secondary_styles", []):
-            lines.append(f"- **{style.get('name')}** ({style.get('confidence')}%): {style.get('reason', '')}")
+            w(f"- **{style.get('name')}** ({style.get('confidence')}%): {style.get('reason', '')}")
         
-        lines.extend([
+        w(
             "",
             "### Summary",
             "",
             refined.get("architectural_summary", ""),
             "",
-        ])
+        )
     
-    lines.extend([
+    w(
         "---",
         "",
         "## Inferred ADRs",
@@ -366,14 +558,34 @@ def _generate_report(results: dict[str, Any]) -> str:
         "",
         "## Deployment Model",
         "",
-        results.get("deployment_model", "No deployment model generated."),
-    ])
+    )
+    # Last line carries no trailing newline
+    buf.write(results.get("deployment_model", "No deployment model generated."))
     
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
-def run_analysis(project_path: str, output_dir: str | None = None) -> dict[str, Any]:
-    """Synchronous wrapper for full AI analysis."""
-    return asyncio.run(
-        full_ai_architecture_analysis(Path(project_path), Path(output_dir) if output_dir else None)
+def run_analysis(
+    project_path: str,
+    output_dir: str | None = None,
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> dict[str, Any]:
+    """Synchronous wrapper for full AI analysis.
+    
+    Pass a long-lived `loop` to keep the shared client's connections warm
+    across calls; otherwise a fresh loop is used and the pool is closed after.
+    """
+    analysis = full_ai_architecture_analysis(
+        Path(project_path), Path(output_dir) if output_dir else None
     )
+    if loop is not None:
+        return loop.run_until_complete(analysis)
+    
+    async def _run() -> dict[str, Any]:
+        try:
+            return await analysis
+        finally:
+            # The shared client's pool belongs to this loop; release it before exit
+            await llm.get_client().aclose()
+    
+    return asyncio.run(_run())
@@ -1,17 +1,43 @@
 """LLM client for Google Generative AI (Gemini) integration."""
 
+import asyncio
+import functools
+import hashlib
 import os
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 
 import httpx
 from dotenv import load_dotenv
 
+# h2 is optional - with it, concurrent requests share one multiplexed
+# HTTP/2 connection instead of opening one connection each
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
 
+# On-disk cache of LLM responses, keyed by a hash of the full request
+CACHE_DIR = Path(os.getenv("RUST_ASR_CACHE_DIR", "~/.cache/rust_asr")).expanduser()
+LLM_CACHE_DIR = CACHE_DIR / "llm"
+
+
+async def _close_on_shutdown(http: httpx.AsyncClient) -> None:
+    """Wait until cancelled, then close `http` on its own loop.
+    
+    `asyncio.run` (and `GeminiClient.close`) cancel pending tasks before
+    closing a loop, so a client never outlives the loop its pool is bound to.
+    """
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await http.aclose()
+
 
 class GeminiClient:
     """Client for Google Generative AI (Gemini) API."""
@@ -21,6 +47,7 @@ class GeminiClient:
         api_key: str | None = None,
         model: str | None = None,
         api_url: str | None = None,
+        use_cache: bool = True,
     ):
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
         self.model = model or os.getenv("GOOGLE_MODEL", "gemini-3-pro-preview")
@@ -34,30 +61,100 @@ class GeminiClient:
                 "GOOGLE_API_KEY not set. "
                 "Set it in .env or pass api_key parameter."
             )
+        
+        self.use_cache = use_cache
+        
+        # Created lazily: an AsyncClient is bound to the loop it first runs on
+        self._http: httpx.AsyncClient | None = None
+        self._http_loop: asyncio.AbstractEventLoop | None = None
+        self._http_guard: asyncio.Task | None = None
+        # Strong references: the event loop only keeps weak ones to tasks
+        self._http_guards: set[asyncio.Task] = set()
+        # Private loop for generate_sync, kept alive so the pool stays warm
+        self._loop: asyncio.AbstractEventLoop | None = None
     
     @property
     def endpoint(self) -> str:
         """Get the API endpoint for text generation."""
         return f"{self.api_url}/v1beta/models/{self.model}:generateContent"
     
-    async def generate(
+    @property
+    def stream_endpoint(self) -> str:
+        """Get the API endpoint for streamed text generation."""
+        return f"{self.api_url}/v1beta/models/{self.model}:streamGenerateContent"
+    
+    def _http_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            # A client left on an earlier loop is closed by its own guard when
+            # that loop shuts down
+            self._http = httpx.AsyncClient(
+                timeout=300.0,
+                headers={"Content-Type": "application/json"},
+                http2=H2_AVAILABLE,
+            )
+            self._http_loop = loop
+            self._http_guard = loop.create_task(_close_on_shutdown(self._http))
+            self._http_guards.add(self._http_guard)
+            self._http_guard.add_done_callback(self._http_guards.discard)
+        return self._http
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client of the running loop."""
+        if self._http is not None and self._http_loop is asyncio.get_running_loop():
+            self._http_guard.cancel()
+            await self._http.aclose()
+        self._http = None
+        self._http_loop = None
+        self._http_guard = None
+    
+    async def __aenter__(self) -> "GeminiClient":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+    
+    def _cache_key(
         self,
         prompt: str,
-        system_prompt: str | None = None,
-        temperature: float = 0.7,
-        max_tokens: int = 4096,
+        system_prompt: str | None,
+        temperature: float,
+        max_tokens: int,
     ) -> str:
-        """Generate text using Gemini API.
-        
-        Args:
-            prompt: The user prompt
-            system_prompt: Optional system instruction
-            temperature: Sampling temperature (0.0-1.0)
-            max_tokens: Maximum tokens to generate
-            
-        Returns:
-            Generated text response
-        """
+        """Hash everything that determines a response."""
+        request = f"{self.model}|{temperature}|{max_tokens}|{system_prompt}|{prompt}"
+        return hashlib.sha256(request.encode()).hexdigest()
+    
+    def _cache_get(self, key: str) -> str | None:
+        """Return a cached response, or None on a miss."""
+        if not self.use_cache:
+            return None
+        try:
+            return (LLM_CACHE_DIR / f"{key}.txt").read_text()
+        except OSError:
+            return None
+    
+    def _cache_put(self, key: str, text: str) -> None:
+        """Store a non-empty response; cache failures are never fatal."""
+        if not self.use_cache or not text:
+            return
+        try:
+            LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = LLM_CACHE_DIR / f"{key}.{os.getpid()}.tmp"
+            tmp.write_text(text)
+            os.replace(tmp, LLM_CACHE_DIR / f"{key}.txt")
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _build_payload(
+        prompt: str,
+        system_prompt: str | None,
+        temperature: float,
+        max_tokens: int,
+    ) -> dict[str, Any]:
+        """Build the generateContent request body."""
         contents = []
         
         if system_prompt:
@@ -75,26 +172,17 @@ class GeminiClient:
             "parts": [{"text": prompt}]
         })
         
-        payload = {
+        return {
             "contents": contents,
             "generationConfig": {
                 "temperature": temperature,
                 "maxOutputTokens": max_tokens,
             }
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.endpoint,
-                json=payload,
-                params={"key": self.api_key},
-                headers={"Content-Type": "application/json"},
-                timeout=300.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-        
-        # Extract text from response
+    
+    @staticmethod
+    def _extract_text(data: dict[str, Any]) -> str:
+        """Extract the first candidate's text from a response (or stream event)."""
         try:
             candidates = data.get("candidates", [])
             if candidates:
@@ -106,6 +194,87 @@ class GeminiClient:
         
         return ""
     
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> str:
+        """Generate text using Gemini API.
+        
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system instruction
+            temperature: Sampling temperature (0.0-1.0)
+            max_tokens: Maximum tokens to generate
+            
+        Returns:
+            Generated text response
+        """
+        key = self._cache_key(prompt, system_prompt, temperature, max_tokens)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        payload = self._build_payload(prompt, system_prompt, temperature, max_tokens)
+        
+        response = await self._http_client().post(
+            self.endpoint,
+            json=payload,
+            params={"key": self.api_key},
+        )
+        response.raise_for_status()
+        
+        text = self._extract_text(response.json())
+        self._cache_put(key, text)
+        return text
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncIterator[str]:
+        """Generate text using Gemini API, yielding chunks as they arrive.
+        
+        Uses the server-sent events variant of streamGenerateContent.
+        Arguments match `generate`.
+        
+        Yields:
+            Text chunks in generation order
+        """
+        key = self._cache_key(prompt, system_prompt, temperature, max_tokens)
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        payload = self._build_payload(prompt, system_prompt, temperature, max_tokens)
+        chunks = []
+        
+        async with self._http_client().stream(
+            "POST",
+            self.stream_endpoint,
+            json=payload,
+            params={"key": self.api_key, "alt": "sse"},
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    event = json.loads(line[len("data:"):])
+                except json.JSONDecodeError:
+                    continue
+                text = self._extract_text(event)
+                if text:
+                    chunks.append(text)
+                    yield text
+        
+        self._cache_put(key, "".join(chunks))
+    
     def generate_sync(
         self,
         prompt: str,
@@ -113,15 +282,40 @@ class GeminiClient:
         temperature: float = 0.7,
         max_tokens: int = 4096,
     ) -> str:
-        """Synchronous version of generate."""
-        import asyncio
-        return asyncio.run(
+        """Synchronous version of generate.
+        
+        Runs on a persistent private event loop, so repeated calls reuse the
+        same HTTP connection pool. Call `close()` when done.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(
             self.generate(prompt, system_prompt, temperature, max_tokens)
         )
+    
+    def close(self) -> None:
+        """Release the private loop used by `generate_sync` and its HTTP pool."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        # Cancel this loop's pool guards, as asyncio.run would, so their clients close
+        pending = [task for task in self._http_guards if task.get_loop() is self._loop]
+        for task in pending:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._loop.close()
+        if self._http_loop is self._loop:
+            self._http = None
+            self._http_loop = None
+            self._http_guard = None
+        self._loop = None
 
 
+@functools.lru_cache(maxsize=1)
 def get_client() -> GeminiClient:
-    """Get a configured Gemini client instance."""
+    """Get the shared Gemini client instance.
+    
+    Memoized so every caller in the process shares one connection pool.
+    """
     return GeminiClient()
 
 
@@ -143,22 +337,22 @@ async def analyze_architecture(
     client = get_client()
     
     if analysis_type == "c4":
-        prompt = prompts.C4_CONTEXT_PROMPT.format(
+        prompt = prompts.render_c4_context(
             codebase_context=codebase_context,
             project_name="Project"
         )
     elif analysis_type == "patterns":
-        prompt = prompts.PATTERN_ANALYSIS_PROMPT.format(
+        prompt = prompts.render_pattern_analysis(
             codebase_context=codebase_context,
             static_patterns="See codebase context"
         )
     elif analysis_type == "ddd":
-        prompt = prompts.DDD_BOUNDED_CONTEXT_PROMPT.format(
+        prompt = prompts.render_ddd_bounded_context(
             codebase_context=codebase_context,
             module_tree="See codebase context"
         )
     else:  # summary
-        prompt = prompts.ARCHITECTURE_SUMMARY_PROMPT.format(
+        prompt = prompts.render_architecture_summary(
             codebase_context=codebase_context,
             dependency_graph="See codebase",
             patterns="See codebase",
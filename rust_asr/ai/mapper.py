@@ -1,8 +1,21 @@
 """Codebase-to-text mapping for LLM context."""
 
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
+from rust_asr.ai._cache import SKIP_DIRS, rust_sources
+
+# Tree-sitter is optional - we fall back to regex if not available
+try:
+    import tree_sitter_rust as tsr
+    from tree_sitter import Language, Parser
+    _RUST_PARSER = Parser(Language(tsr.language()))
+    TREE_SITTER_AVAILABLE = True
+except (ImportError, TypeError):
+    TREE_SITTER_AVAILABLE = False
 
 # Priority files for architecture understanding
 PRIORITY_FILES = [
@@ -13,56 +26,86 @@ PRIORITY_FILES = [
     "README.md",
 ]
 
+# Public type definitions; group(1) is the kind, group(2) the name
+_TYPE_RE = re.compile(rb"pub\s+(struct|enum|trait)\s+(\w+)")
+_TYPE_KINDS = {b"struct": "struct", b"enum": "enum", b"trait": "trait"}
+# Same kinds keyed by tree-sitter node type
+_TYPE_NODES = {"struct_item": "struct", "enum_item": "enum", "trait_item": "trait"}
+
 
 def map_codebase(project_path: Path, max_tokens: int = 100000) -> str:
-    """Map codebase to LLM-friendly text format."""
-    lines = []
+    """Map codebase to LLM-friendly text format.
+    
+    Output is bounded by a rough token budget (4 chars per token); mapping
+    stops as soon as the budget is spent instead of truncating afterwards.
+    """
+    lines: list[str] = []
+    budget = max_tokens * 4
+    size = 0
+    
+    def emit(line: str) -> bool:
+        """Append a line; return False once the budget is exhausted."""
+        nonlocal size
+        lines.append(line)
+        size += len(line) + 1
+        return size <= budget
+    
+    def finish() -> str:
+        result = "\n".join(lines)
+        if len(result) > budget:
+            result = result[:budget] + "\n... (truncated for token limit)"
+        return result
     
     # Project header
-    lines.append(f"# Codebase: {project_path.name}")
-    lines.append("")
+    emit(f"# Codebase: {project_path.name}")
+    emit("")
     
     # Directory structure
-    lines.append("## Directory Structure")
-    lines.append("```")
-    lines.extend(_get_tree(project_path, max_depth=3))
-    lines.append("```")
-    lines.append("")
+    emit("## Directory Structure")
+    emit("```")
+    for line in _get_tree(project_path, max_depth=3):
+        if not emit(line):
+            return finish()
+    emit("```")
+    emit("")
     
     # Priority files content
-    lines.append("## Key Files")
-    
-    for pf in PRIORITY_FILES:
-        file_path = project_path / pf
-        if file_path.exists():
-            lines.append(f"### {pf}")
-            lines.append("```rust" if pf.endswith(".rs") else "```toml" if pf.endswith(".toml") else "```")
-            try:
-                content = file_path.read_text()
-                # Truncate if too long
-                if len(content) > 5000:
-                    content = content[:5000] + "\n... (truncated)"
-                lines.append(content)
-            except Exception as e:
-                lines.append(f"Error reading: {e}")
-            lines.append("```")
-            lines.append("")
+    emit("## Key Files")
     
-    # Module listing
-    lines.append("## Modules")
-    src_path = project_path / "src"
-    if src_path.exists():
-        for rs_file in sorted(src_path.rglob("*.rs")):
-            rel_path = rs_file.relative_to(project_path)
-            lines.append(f"- `{rel_path}`")
+    # The reads are independent, so issue them together rather than one by one
+    existing = [pf for pf in PRIORITY_FILES if (project_path / pf).exists()]
+    with ThreadPoolExecutor(max_workers=len(PRIORITY_FILES)) as pool:
+        contents = list(pool.map(lambda pf: _read_head(project_path / pf), existing))
     
-    result = "\n".join(lines)
+    for pf, content in zip(existing, contents):
+        emit(f"### {pf}")
+        emit("```rust" if pf.endswith(".rs") else "```toml" if pf.endswith(".toml") else "```")
+        emit(content)
+        emit("```")
+        if not emit(""):
+            return finish()
     
-    # Rough token estimation (4 chars per token)
-    if len(result) > max_tokens * 4:
-        result = result[:max_tokens * 4] + "\n... (truncated for token limit)"
+    # Module listing
+    emit("## Modules")
+    for rs_file, _ in rust_sources(project_path):
+        rel_path = rs_file.relative_to(project_path)
+        if not emit(f"- `{rel_path}`"):
+            break
     
-    return result
+    return finish()
+
+
+def _read_head(file_path: Path, limit: int = 5000) -> str:
+    """Read at most `limit` characters of a file, marking truncation."""
+    try:
+        # Read just past the cap to know whether to mark truncation
+        with open(file_path) as f:
+            content = f.read(limit + 1)
+    except Exception as e:
+        return f"Error reading: {e}"
+    if len(content) > limit:
+        content = content[:limit] + "\n... (truncated)"
+    return content
 
 
 def _get_tree(path: Path, max_depth: int = 3, prefix: str = "") -> list[str]:
@@ -72,23 +115,26 @@ def _get_tree(path: Path, max_depth: int = 3, prefix: str = "") -> list[str]:
     if max_depth <= 0:
         return lines
     
+    # scandir entries carry their file type, so sorting and the dir check
+    # below need no extra stat() calls. Non-essential directories are
+    # dropped before sorting so they are never recursed into.
     try:
-        entries = sorted(path.iterdir(), key=lambda x: (x.is_file(), x.name))
-    except PermissionError:
+        with os.scandir(path) as it:
+            entries = sorted(
+                (e for e in it if e.name not in SKIP_DIRS),
+                key=lambda e: (not e.is_dir(follow_symlinks=False), e.name),
+            )
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
         return lines
     
-    # Filter out common non-essential directories
-    skip_dirs = {".git", "target", "node_modules", ".cargo", "__pycache__"}
-    entries = [e for e in entries if e.name not in skip_dirs]
-    
     for i, entry in enumerate(entries):
         is_last = i == len(entries) - 1
         connector = "└── " if is_last else "├── "
         
-        if entry.is_dir():
+        if entry.is_dir(follow_symlinks=False):
             lines.append(f"{prefix}{connector}{entry.name}/")
             extension = "    " if is_last else "│   "
-            lines.extend(_get_tree(entry, max_depth - 1, prefix + extension))
+            lines.extend(_get_tree(Path(entry.path), max_depth - 1, prefix + extension))
         else:
             lines.append(f"{prefix}{connector}{entry.name}")
     
@@ -96,34 +142,59 @@ def _get_tree(path: Path, max_depth: int = 3, prefix: str = "") -> list[str]:
 
 
 def extract_key_types(project_path: Path) -> list[dict[str, Any]]:
-    """Extract key type definitions (structs, enums, traits)."""
-    types = []
+    """Extract key type definitions (structs, enums, traits).
     
-    src_path = project_path / "src"
-    if not src_path.exists():
-        return types
-    
-    import re
+    Uses tree-sitter when available, which skips matches inside comments and
+    strings; otherwise scans with a regex.
+    """
+    types = []
+    scan = _scan_types_ast if TREE_SITTER_AVAILABLE else _scan_types_regex
     
-    patterns = {
-        "struct": r"pub\s+struct\s+(\w+)",
-        "enum": r"pub\s+enum\s+(\w+)",
-        "trait": r"pub\s+trait\s+(\w+)",
-    }
-    
-    for rs_file in src_path.rglob("*.rs"):
-        try:
-            content = rs_file.read_text()
-            rel_path = str(rs_file.relative_to(project_path))
-            
-            for type_kind, pattern in patterns.items():
-                for match in re.finditer(pattern, content):
-                    types.append({
-                        "kind": type_kind,
-                        "name": match.group(1),
-                        "file": rel_path,
-                    })
-        except Exception:
-            continue
+    for rs_file, content in rust_sources(project_path):
+        rel_path = str(rs_file.relative_to(project_path))
+        for kind, name in scan(content):
+            types.append({
+                "kind": kind,
+                "name": name,
+                "file": rel_path,
+            })
     
     return types
+
+
+def _scan_types_regex(content: bytes) -> list[tuple[str, str]]:
+    """Find `pub` struct/enum/trait definitions with a regex."""
+    return [
+        (_TYPE_KINDS[match.group(1)], match.group(2).decode())
+        for match in _TYPE_RE.finditer(content)
+    ]
+
+
+def _scan_types_ast(content: bytes) -> list[tuple[str, str]]:
+    """Find `pub` struct/enum/trait definitions in the tree-sitter parse tree.
+    
+    Only item containers (the file and inline `mod` bodies) are descended,
+    matching where public types can be declared.
+    """
+    found = []
+    stack = [_RUST_PARSER.parse(content).root_node]
+    while stack:
+        node = stack.pop()
+        for child in node.children:
+            if child.type == "mod_item":
+                body = child.child_by_field_name("body")
+                if body is not None:
+                    stack.append(body)
+                continue
+            
+            kind = _TYPE_NODES.get(child.type)
+            if kind is None:
+                continue
+            vis = child.children[0] if child.children else None
+            if vis is None or vis.type != "visibility_modifier" or vis.text != b"pub":
+                continue
+            name = child.child_by_field_name("name")
+            if name is not None:
+                found.append((kind, name.text.decode()))
+    
+    return found
@@ -1,5 +1,8 @@
 """Prompt templates for AI-assisted architecture analysis."""
 
+import string
+from typing import Callable
+
 
 C4_CONTEXT_PROMPT = """You are a software architect analyzing a Rust codebase.
 
@@ -247,7 +250,97 @@ Output as structured markdown.
 """
 
 
+COMBINED_ANALYSIS_PROMPT = """You are a senior Rust software architect. Analyze this project once and answer three questions together: its architecture style, the architectural decisions it embodies, and its deployment model.
+
+Project: {project_name}
+
+Workspace structure:
+{workspace_info}
+
+Detected styles from static analysis:
+{detected_styles}
+
+Communication patterns:
+{communication_patterns}
+
+Key dependencies:
+{dependencies}
+
+Codebase context:
+{codebase_context}
+
+Detected patterns:
+{patterns}
+
+Cargo.toml features:
+{features}
+
+Binary targets:
+{binaries}
+
+Dependencies suggesting deployment:
+{deployment_deps}
+
+Tasks:
+1. style: Validate or refine the detected architecture styles. Pick ONE primary style, give 2-3 concrete evidence points, and list any secondary styles.
+2. adrs: Infer the 3-5 most significant Architectural Decision Records. For each give Title, Status (Accepted), Context, Decision, Consequences (positive and negative) and Evidence, formatted as markdown sections "## ADR-001: [Title]" separated by "---".
+3. deployment: Describe the deployment model (standalone binary, library, service, CLI tool, etc.), runtime requirements, configuration approach and scaling characteristics as structured markdown.
+
+Output a single JSON object and nothing else:
+```json
+{{
+    "style": {{
+        "primary_style": "Style Name",
+        "primary_confidence": 85,
+        "primary_evidence": ["Evidence 1", "Evidence 2"],
+        "secondary_styles": [
+            {{"name": "Style", "confidence": 60, "reason": "..."}}
+        ],
+        "architectural_summary": "2-3 sentence summary"
+    }},
+    "adrs": "## ADR-001: ...markdown...",
+    "deployment": "...markdown..."
+}}
+```
+"""
+
+
 def format_prompt(template: str, **kwargs) -> str:
     """Format a prompt template with provided values."""
     return template.format(**kwargs)
 
+
+def compile_prompt(template: str) -> Callable[..., str]:
+    """Pre-parse a prompt template into a renderer.
+    
+    The template is split into literal/field segments once, so rendering is a
+    single join instead of a `str.format` re-parse per call. Only plain
+    `{name}` fields are supported (no conversions or format specs).
+    """
+    segments: list[tuple[str, str | None]] = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if spec or conversion:
+            raise ValueError(f"Unsupported replacement field in prompt: {{{field}}}")
+        segments.append((literal, field))
+    
+    def render(**kwargs: object) -> str:
+        parts = []
+        for literal, field in segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(kwargs[field]))
+        return "".join(parts)
+    
+    return render
+
+
+render_c4_context = compile_prompt(C4_CONTEXT_PROMPT)
+render_c4_container = compile_prompt(C4_CONTAINER_PROMPT)
+render_ddd_bounded_context = compile_prompt(DDD_BOUNDED_CONTEXT_PROMPT)
+render_pattern_analysis = compile_prompt(PATTERN_ANALYSIS_PROMPT)
+render_architecture_summary = compile_prompt(ARCHITECTURE_SUMMARY_PROMPT)
+render_architecture_style_refinement = compile_prompt(ARCHITECTURE_STYLE_REFINEMENT_PROMPT)
+render_adr_extraction = compile_prompt(ADR_EXTRACTION_PROMPT)
+render_c4_component_enhanced = compile_prompt(C4_COMPONENT_ENHANCED_PROMPT)
+render_deployment_model = compile_prompt(DEPLOYMENT_MODEL_PROMPT)
+render_combined_analysis = compile_prompt(COMBINED_ANALYSIS_PROMPT)
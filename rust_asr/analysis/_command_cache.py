@@ -0,0 +1,65 @@
+"""In-process memo of external tool output (cargo, tokei).
+
+Several analyzers shell out for the same project within one run, and each
+`cargo` invocation re-walks the workspace. Results are kept per command and
+project for the life of the process, and are dropped once `Cargo.toml`,
+`Cargo.lock` or the source directory listing changes.
+"""
+
+import functools
+import subprocess
+from pathlib import Path
+
+
+def run_cached(
+    cmd: list[str], project_path: Path, timeout: int = 60
+) -> subprocess.CompletedProcess:
+    """Run `cmd` in `project_path` with text output, reusing an earlier result.
+
+    A missing tool (FileNotFoundError) or a timeout is remembered and
+    re-raised as well, so a failing command is not retried in the same state.
+
+    Args:
+        cmd: Command and arguments
+        project_path: Project to run in; also the cache key
+        timeout: Seconds before subprocess.TimeoutExpired is raised
+    """
+    project_path = project_path.resolve()
+    result, error = _run(tuple(cmd), str(project_path), timeout, _fingerprint(project_path))
+    if error is not None:
+        # Drop the traceback of the earlier raise so it does not keep growing
+        raise error.with_traceback(None)
+    return result
+
+
+def _fingerprint(project_path: Path) -> tuple[int | None, ...]:
+    """mtimes of the files and directories whose change invalidates a result."""
+    stamps = []
+    for path in (
+        project_path / "Cargo.toml",
+        project_path / "Cargo.lock",
+        project_path / "src",
+    ):
+        try:
+            stamps.append(path.stat().st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+@functools.lru_cache(maxsize=32)
+def _run(
+    cmd: tuple[str, ...], cwd: str, timeout: int, fingerprint: tuple[int | None, ...]
+) -> tuple[subprocess.CompletedProcess | None, Exception | None]:
+    """Run a command once per (cmd, cwd, timeout, fingerprint)."""
+    try:
+        result = subprocess.run(
+            list(cmd),
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        return None, e
+    return result, None
@@ -0,0 +1,86 @@
+"""On-disk, per-file result cache shared by the static analyzers.
+
+Each analyzer stores one JSON file per project under
+`RUST_ASR_CACHE_DIR/<analyzer>/`, mapping every source file to the
+`(mtime_ns, size)` it was scanned at and the scan result. Files whose mtime
+and size are unchanged on the next run reuse their stored result.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+CACHE_DIR = Path(os.getenv("RUST_ASR_CACHE_DIR", "~/.cache/rust_asr")).expanduser()
+
+
+class FileCache:
+    """Per-file scan results for one analyzer and one project."""
+    
+    def __init__(self, analyzer: str, project_path: Path, version: int, enabled: bool = True):
+        """
+        Args:
+            analyzer: Subdirectory of CACHE_DIR the results are stored in
+            project_path: Project whose files are cached
+            version: Format version; bump it when the analyzer's output changes
+            enabled: When False, every lookup misses and nothing is written
+        """
+        digest = hashlib.sha256(str(project_path.resolve()).encode("utf-8")).hexdigest()[:16]
+        self.path = CACHE_DIR / analyzer / f"{project_path.name}-{digest}.json"
+        self.version = version
+        self.enabled = enabled
+        self._old: dict[str, list] = self._load() if enabled else {}
+        self._new: dict[str, list] = {}
+        self._dirty = False
+    
+    def get(self, file_path: Path) -> Any | None:
+        """Return the stored result for `file_path`, or None if it must be rescanned."""
+        if not self.enabled:
+            return None
+        try:
+            st = file_path.stat()
+        except OSError:
+            return None
+        
+        key = str(file_path)
+        entry = self._old.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            self._new[key] = entry
+            return entry[2]
+        
+        # Remember the stamp now so put() records what was actually scanned
+        self._new[key] = [st.st_mtime_ns, st.st_size, None]
+        self._dirty = True
+        return None
+    
+    def put(self, file_path: Path, result: Any) -> None:
+        """Store the result for a file that get() reported as a miss."""
+        entry = self._new.get(str(file_path))
+        if entry is not None:
+            entry[2] = result
+    
+    def save(self) -> None:
+        """Persist the cache atomically if anything changed; failures only cost a rescan."""
+        if not self.enabled or not (self._dirty or len(self._new) != len(self._old)):
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps({"version": self.version, "files": self._new}), encoding="utf-8"
+            )
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+    
+    def _load(self) -> dict[str, list]:
+        """Load `{file: [mtime_ns, size, result]}`, or {} if missing or stale."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return {}
+        return data.get("files", {})
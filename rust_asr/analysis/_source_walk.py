@@ -0,0 +1,62 @@
+"""Directory walk and newline handling for the Rust sources of a project.
+
+`Path.rglob("*.rs")` lists every directory twice (once to match files, once to
+find subdirectories) and stats each entry again. os.scandir lists a directory
+once and its entries already carry their file type.
+"""
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+
+# VCS and package-manager directories that never hold project sources. A
+# `target/` directory is only skipped when it is cargo's build output: it can
+# also be an ordinary module directory (e.g. cc's `src/target/`).
+SKIP_DIRS = frozenset({".git", "node_modules"})
+
+# Files cargo writes at the top of its build directory
+_CARGO_TARGET_MARKERS = ("CACHEDIR.TAG", ".rustc_info.json")
+
+
+def walk_rust_files(root: Path | str) -> Iterator[Path]:
+    """Yield the `.rs` files under `root` in `rglob("*.rs")` order.
+    
+    As with rglob, a directory's own files come before those of its
+    subdirectories and symlinked directories are not followed. `SKIP_DIRS`
+    and cargo build directories are never descended into.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
+    
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if entry.name not in SKIP_DIRS and not (
+                entry.name == "target" and _is_cargo_target_dir(entry.path)
+            ):
+                subdirs.append(entry.path)
+        elif entry.name.endswith(".rs"):
+            yield Path(entry.path)
+    
+    for subdir in subdirs:
+        yield from walk_rust_files(subdir)
+
+
+def _is_cargo_target_dir(path: str) -> bool:
+    """Check whether a `target` directory is cargo's build output."""
+    return any(os.path.exists(os.path.join(path, marker)) for marker in _CARGO_TARGET_MARKERS)
+
+
+def normalize_newlines(raw: bytes) -> bytes:
+    """Translate CRLF and lone CR to LF, as `read_text`'s universal newlines would."""
+    if b"\r" in raw:
+        raw = raw.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return raw
@@ -6,6 +6,7 @@ Uses LLM to validate and refine static analysis results:
 - Provide architecture style confidence scores
 """
 
+from collections import Counter
 from pathlib import Path
 from typing import Any
 
@@ -24,7 +25,7 @@ def create_validation_prompt(analysis_results: dict[str, Any]) -> str:
     patterns = analysis_results.get("patterns", [])
     workspace = analysis_results.get("workspace", {})
     
-    prompt = f"""You are a Rust software architecture expert. Analyze the following static analysis results and validate/refine the detected architectural patterns.
+    parts = [f"""You are a Rust software architecture expert. Analyze the following static analysis results and validate/refine the detected architectural patterns.
 
 ## Project: {analysis_results.get('project_name', 'Unknown')}
 
@@ -33,17 +34,17 @@ def create_validation_prompt(analysis_results: dict[str, Any]) -> str:
 - Is workspace: {workspace.get('is_workspace', False)}
 
 ## Detected Architecture Styles
-"""
+"""]
     
     for style in styles[:5]:
-        prompt += f"- **{style['style']}** ({style['confidence']:.0%}): {', '.join(style.get('evidence', []))}\n"
+        parts.append(f"- **{style['style']}** ({style['confidence']:.0%}): {', '.join(style.get('evidence', []))}\n")
     
-    prompt += "\n## Detected Design Patterns\n"
+    parts.append("\n## Detected Design Patterns\n")
     
     for pattern in patterns[:5]:
-        prompt += f"- **{pattern['name']}** ({pattern['confidence']:.0%}): {', '.join(pattern.get('evidence', []))}\n"
+        parts.append(f"- **{pattern['name']}** ({pattern['confidence']:.0%}): {', '.join(pattern.get('evidence', []))}\n")
     
-    prompt += """
+    parts.append("""
 
 ## Your Task
 
@@ -74,8 +75,8 @@ Respond in JSON format:
   "overall_assessment": "..."
 }
 ```
-"""
-    return prompt
+""")
+    return "".join(parts)
 
 
 def create_c4_enhancement_prompt(
@@ -92,7 +93,7 @@ def create_c4_enhancement_prompt(
     Returns:
         Formatted prompt string for LLM
     """
-    prompt = f"""You are a software architect specializing in C4 diagrams. Review and enhance this C4 Container diagram for a Rust project.
+    parts = [f"""You are a software architect specializing in C4 diagrams. Review and enhance this C4 Container diagram for a Rust project.
 
 ## Current Diagram
 ```mermaid
@@ -105,18 +106,15 @@ def create_c4_enhancement_prompt(
 - Clusters: {knowledge_graph.get('stats', {}).get('total_clusters', 0)}
 
 ## Top Relationships
-"""
+"""]
     
     edges = knowledge_graph.get("edges", [])
-    rel_counts: dict[str, int] = {}
-    for edge in edges:
-        rel = edge.get("relationship", "unknown")
-        rel_counts[rel] = rel_counts.get(rel, 0) + 1
+    rel_counts = Counter(edge.get("relationship", "unknown") for edge in edges)
     
-    for rel, count in sorted(rel_counts.items(), key=lambda x: -x[1])[:5]:
-        prompt += f"- {rel}: {count}\n"
+    for rel, count in rel_counts.most_common(5):
+        parts.append(f"- {rel}: {count}\n")
     
-    prompt += """
+    parts.append("""
 
 ## Your Task
 
@@ -127,8 +125,8 @@ Enhance the C4 diagram by:
 4. Adding notes for key design decisions
 
 Return enhanced Mermaid C4 diagram only, no explanation needed.
-"""
-    return prompt
+""")
+    return "".join(parts)
 
 
 def create_adr_extraction_prompt(readme_content: str, cargo_toml: str) -> str:
@@ -176,6 +174,7 @@ Extract 3-5 key ADRs.
 def fuse_static_and_ai_results(
     static_results: dict[str, Any],
     ai_response: dict[str, Any],
+    in_place: bool = False,
 ) -> dict[str, Any]:
     """
     Fuse static analysis results with AI validation.
@@ -183,18 +182,21 @@ def fuse_static_and_ai_results(
     Args:
         static_results: Results from static analysis
         ai_response: Parsed response from LLM
+        in_place: Add the AI keys to `static_results` itself instead of to a
+            shallow copy of it
         
     Returns:
         Combined results with adjusted confidence scores
     """
-    fused = static_results.copy()
+    fused = static_results if in_place else static_results.copy()
     
-    if "validated_patterns" in ai_response:
-        validated = {p["name"]: p for p in ai_response["validated_patterns"]}
+    validated_patterns = ai_response.get("validated_patterns")
+    if validated_patterns:
+        validated = {p["name"]: p for p in validated_patterns}
         
-        for pattern in fused.get("patterns", []):
-            if pattern["name"] in validated:
-                ai_pattern = validated[pattern["name"]]
+        for pattern in fused.get("patterns", ()):
+            ai_pattern = validated.get(pattern["name"])
+            if ai_pattern is not None:
                 original_conf = pattern["confidence"]
                 ai_conf = ai_pattern.get("confidence", original_conf)
                 pattern["confidence"] = (original_conf + ai_conf) / 2
@@ -262,4 +264,5 @@ def export_ai_analysis_report(
     if assessment:
         lines.extend(["## Overall Assessment", "", assessment, ""])
     
-    output_path.write_text("\n".join(lines))
+    with output_path.open("w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
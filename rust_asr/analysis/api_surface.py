@@ -4,43 +4,122 @@ Analyzes visibility modifiers to identify the public interface of a crate.
 Helps determine component boundaries for C4 diagrams.
 """
 
+import bisect
+import heapq
 import re
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import Any
 
+from ._file_cache import FileCache
 from .architecture import _iter_source_files
 
+# NumPy is optional - it finds newlines and maps offsets to lines in bulk
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
-# Visibility patterns in Rust
+
+# Visibility patterns in Rust (ASCII-only \s/\w; Rust keywords are ASCII)
 VISIBILITY_PATTERNS = {
-    "pub": r"\bpub\s+",
-    "pub(crate)": r"pub\s*\(\s*crate\s*\)",
-    "pub(super)": r"pub\s*\(\s*super\s*\)",
-    "pub(self)": r"pub\s*\(\s*self\s*\)",
-    "pub(in path)": r"pub\s*\(\s*in\s+[a-zA-Z_:]+\s*\)",
+    name: re.compile(pattern, re.ASCII)
+    for name, pattern in {
+        "pub": r"\bpub\s+",
+        "pub(crate)": r"pub\s*\(\s*crate\s*\)",
+        "pub(super)": r"pub\s*\(\s*super\s*\)",
+        "pub(self)": r"pub\s*\(\s*self\s*\)",
+        "pub(in path)": r"pub\s*\(\s*in\s+[a-zA-Z_:]+\s*\)",
+    }.items()
 }
 
+# Below this many files, scan serially instead of starting a process pool
+PARALLEL_MIN_FILES = 8
+
+# Threads used to read files when scanning in-process
+READ_WORKERS = 8
+
+# Per-file scan results are cached under RUST_ASR_CACHE_DIR/api_surface;
+# bump when item extraction changes so stale entries are ignored
+CACHE_VERSION = 1
+
+# Every public item kind in one alternation, so each file is scanned once
+# (bytes: sources are scanned undecoded, only captured spans are decoded)
+_ITEM_RE = re.compile(
+    rb"(?P<vis>pub(?:\s*\([^)]*\))?)\s+(?:async\s+)?"
+    rb"(?P<kind>struct|enum|trait|fn|mod|type|const|static)\s+(?P<name>\w+)",
+    re.ASCII,
+)
+
+# A doc comment block followed by the item it documents
+_DOC_RE = re.compile(
+    rb"((?:///[^\n]*\n)+|/\*\*[\s\S]*?\*/)\s*(?:pub(?:\s*\([^)]*\))?\s+)?(?:async\s+)?"
+    rb"(?:struct|enum|trait|fn|mod|type|const|static)\s+(\w+)",
+    re.ASCII,
+)
 
-def analyze_api_surface(project_path: Path) -> dict[str, Any]:
+
+def analyze_api_surface(project_path: Path, use_cache: bool = True) -> dict[str, Any]:
     """
     Extract the public API surface of a Rust project.
     
+    Args:
+        project_path: Path to the Rust project
+        use_cache: Reuse items for files whose mtime and size are unchanged
+            since the last run
+    
     Returns:
         dict with public items categorized by type and visibility level
     """
-    api_items: list[dict[str, Any]] = []
-    
-    for rs_file in _iter_source_files(project_path, include_tests=False):
-        try:
-            content = rs_file.read_text(errors="ignore")
-            rel_path = str(rs_file.relative_to(project_path))
-            
-            items = _extract_pub_items(content, rel_path)
-            api_items.extend(items)
-        except Exception:
+    files = list(_iter_source_files(project_path, include_tests=False))
+    
+    cache = FileCache("api_surface", project_path, CACHE_VERSION, enabled=use_cache)
+    per_file: list[list[dict[str, Any]] | None] = [None] * len(files)
+    misses: list[int] = []
+    
+    for index, rs_file in enumerate(files):
+        per_file[index] = cache.get(rs_file)
+        if per_file[index] is None:
+            misses.append(index)
+    
+    # Scanning is regex-bound, so spread files across processes; for a
+    # handful of files the pool start-up would cost more than it saves
+    miss_files = [files[index] for index in misses]
+    if len(miss_files) < PARALLEL_MIN_FILES:
+        # Few files (small crates, incremental re-runs): overlap the reads on
+        # threads and scan in this process
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+            contents = list(pool.map(_read_source, miss_files))
+        scanned = [
+            _scan_content(content, rs_file, project_path)
+            for rs_file, content in zip(miss_files, contents)
+        ]
+    else:
+        # Each worker reads the files it scans, so reads already overlap
+        # across processes; reading them here first would only add a copy
+        # of every file's bytes through the pool's pipe
+        with ProcessPoolExecutor() as pool:
+            scanned = list(
+                pool.map(_scan_one_file, miss_files, repeat(project_path), chunksize=16)
+            )
+    
+    for index, items in zip(misses, scanned):
+        if items is None:
+            # Unreadable file: contributes nothing, but is not cached so it is
+            # rescanned once it can be read again
+            per_file[index] = []
             continue
+        per_file[index] = items
+        cache.put(files[index], items)
+    cache.save()
+    
+    api_items = [item for items in per_file for item in items]
     
     categorized = _categorize_api(api_items)
+    type_counts = categorized["type_counts"]
     
     return {
         "project": project_path.name,
@@ -50,52 +129,71 @@ def analyze_api_surface(project_path: Path) -> dict[str, Any]:
         "by_module": categorized["by_module"],
         "stats": {
             "total_pub_items": len(api_items),
-            "pub_structs": sum(1 for i in api_items if i["type"] == "struct"),
-            "pub_enums": sum(1 for i in api_items if i["type"] == "enum"),
-            "pub_traits": sum(1 for i in api_items if i["type"] == "trait"),
-            "pub_functions": sum(1 for i in api_items if i["type"] == "fn"),
-            "pub_modules": sum(1 for i in api_items if i["type"] == "mod"),
+            "pub_structs": type_counts["struct"],
+            "pub_enums": type_counts["enum"],
+            "pub_traits": type_counts["trait"],
+            "pub_functions": type_counts["fn"],
+            "pub_modules": type_counts["mod"],
         }
     }
 
 
-def _extract_pub_items(content: str, file_path: str) -> list[dict[str, Any]]:
+def _scan_one_file(rs_file: Path, project_path: Path) -> list[dict[str, Any]] | None:
+    """Read one source file and extract its public items (runs in a worker)."""
+    return _scan_content(_read_source(rs_file), rs_file, project_path)
+
+
+def _read_source(rs_file: Path) -> bytes | None:
+    """Read a source file, returning None if it cannot be read."""
+    try:
+        return rs_file.read_bytes()
+    except OSError:
+        return None
+
+
+def _scan_content(
+    content: bytes | None, rs_file: Path, project_path: Path
+) -> list[dict[str, Any]] | None:
+    """Extract public items from already-read file content.
+    
+    Returns None if the file could not be read (`content` is None).
+    """
+    if content is None:
+        return None
+    # Files without a single `pub` cannot contribute to the API surface
+    if b"pub" not in content:
+        return []
+    try:
+        rel_path = str(rs_file.relative_to(project_path))
+        return _extract_pub_items(content, rel_path)
+    except Exception:
+        return []
+
+
+def _extract_pub_items(content: bytes, file_path: str) -> list[dict[str, Any]]:
     """Extract all public items from a Rust source file."""
     items = []
+    newlines = _newline_offsets(content)
+    matches = [
+        match for match in _ITEM_RE.finditer(content)
+        if match.group("name") not in (b"self", b"Self", b"crate", b"super")
+    ]
+    line_numbers = _line_numbers(newlines, [match.start() for match in matches])
     
-    patterns = {
-        "struct": r"(pub(?:\s*\([^)]*\))?\s+)struct\s+(\w+)",
-        "enum": r"(pub(?:\s*\([^)]*\))?\s+)enum\s+(\w+)",
-        "trait": r"(pub(?:\s*\([^)]*\))?\s+)trait\s+(\w+)",
-        "fn": r"(pub(?:\s*\([^)]*\))?\s+)(?:async\s+)?fn\s+(\w+)",
-        "mod": r"(pub(?:\s*\([^)]*\))?\s+)mod\s+(\w+)",
-        "type": r"(pub(?:\s*\([^)]*\))?\s+)type\s+(\w+)",
-        "const": r"(pub(?:\s*\([^)]*\))?\s+)const\s+(\w+)",
-        "static": r"(pub(?:\s*\([^)]*\))?\s+)static\s+(\w+)",
-    }
+    for match, line_number in zip(matches, line_numbers):
+        name = match.group("name").decode("ascii")
+        visibility_str = match.group("vis").decode("ascii", "ignore")
+        
+        items.append({
+            "name": name,
+            "type": match.group("kind").decode("ascii"),
+            "visibility": _parse_visibility(visibility_str),
+            "visibility_raw": visibility_str,
+            "file": file_path,
+            "line": line_number,
+        })
     
-    for item_type, pattern in patterns.items():
-        for match in re.finditer(pattern, content):
-            visibility_str = match.group(1).strip()
-            name = match.group(2)
-            
-            if name in ["self", "Self", "crate", "super"]:
-                continue
-            
-            visibility = _parse_visibility(visibility_str)
-            
-            line_number = content[:match.start()].count("\n") + 1
-            
-            items.append({
-                "name": name,
-                "type": item_type,
-                "visibility": visibility,
-                "visibility_raw": visibility_str,
-                "file": file_path,
-                "line": line_number,
-            })
-    
-    docstrings = _extract_docstrings(content, items)
+    docstrings = _extract_docstrings(content, items, newlines)
     for item in items:
         key = f"{item['type']}:{item['name']}:{item['line']}"
         if key in docstrings:
@@ -107,31 +205,72 @@ def _extract_pub_items(content: str, file_path: str) -> list[dict[str, Any]]:
 def _parse_visibility(vis_str: str) -> str:
     """Parse visibility string to canonical form."""
     vis_str = vis_str.strip()
+    if not vis_str.startswith("pub"):
+        return "private"
+    
+    # `pub ( crate )` and friends: compare the restriction with whitespace removed
+    _, paren, restriction = vis_str.partition("(")
+    if not paren:
+        return "pub"
     
-    if re.match(r"pub\s*\(\s*crate\s*\)", vis_str):
+    compact = "".join(restriction.split())
+    if compact.startswith("crate)"):
         return "pub(crate)"
-    elif re.match(r"pub\s*\(\s*super\s*\)", vis_str):
+    elif compact.startswith("super)"):
         return "pub(super)"
-    elif re.match(r"pub\s*\(\s*self\s*\)", vis_str):
+    elif compact.startswith("self)"):
         return "pub(self)"
-    elif re.match(r"pub\s*\(\s*in\s+", vis_str):
+    elif restriction.split(None, 1)[0:1] == ["in"]:
         return "pub(in ...)"
-    elif vis_str.startswith("pub"):
-        return "pub"
-    return "private"
+    return "pub"
+
+
+def _newline_offsets(content: bytes) -> "list[int] | np.ndarray":
+    """Offsets of every newline, for O(log n) offset-to-line lookups.
+    
+    Returns a NumPy array when NumPy is available, otherwise a list.
+    """
+    if NUMPY_AVAILABLE:
+        return np.flatnonzero(np.frombuffer(content, dtype=np.uint8) == ord("\n"))
+    
+    offsets = []
+    i = content.find(b"\n")
+    while i != -1:
+        offsets.append(i)
+        i = content.find(b"\n", i + 1)
+    return offsets
+
+
+def _line_numbers(newlines: "list[int] | np.ndarray", offsets: list[int]) -> list[int]:
+    """Map byte offsets to 1-based line numbers given sorted newline offsets."""
+    if NUMPY_AVAILABLE and isinstance(newlines, np.ndarray):
+        return (np.searchsorted(newlines, offsets, side="right") + 1).tolist()
+    return [bisect.bisect_right(newlines, offset) + 1 for offset in offsets]
 
 
 def _extract_docstrings(
-    content: str, items: list[dict[str, Any]]
+    content: bytes,
+    items: list[dict[str, Any]],
+    newlines: "list[int] | np.ndarray | None" = None,
 ) -> dict[str, str]:
     """Extract doc comments for items."""
     docstrings: dict[str, str] = {}
+    # Undocumented files are common; skip the regex when there is nothing to find
+    if b"///" not in content and b"/**" not in content:
+        return docstrings
+    if newlines is None:
+        newlines = _newline_offsets(content)
     
-    doc_pattern = r"((?:///[^\n]*\n)+|/\*\*[\s\S]*?\*/)\s*(?:pub(?:\s*\([^)]*\))?\s+)?(?:async\s+)?(?:struct|enum|trait|fn|mod|type|const|static)\s+(\w+)"
+    items_by_name: defaultdict[str, list] = defaultdict(list)
+    for item in items:
+        items_by_name[item["name"]].append(item)
     
-    for match in re.finditer(doc_pattern, content):
-        doc_raw = match.group(1)
-        name = match.group(2)
+    matches = list(_DOC_RE.finditer(content))
+    line_numbers = _line_numbers(newlines, [match.start() for match in matches])
+    
+    for match, line_num in zip(matches, line_numbers):
+        doc_raw = match.group(1).decode("utf-8", "ignore")
+        name = match.group(2).decode("ascii")
         
         if doc_raw.startswith("///"):
             doc = "\n".join(
@@ -143,9 +282,8 @@ def _extract_docstrings(
             doc = doc_raw.strip("/*").strip("*/").strip()
         
         if doc:
-            line_num = content[:match.start()].count("\n") + 1
-            for item in items:
-                if item["name"] == name and abs(item["line"] - line_num) < 5:
+            for item in items_by_name.get(name, ()):
+                if abs(item["line"] - line_num) < 5:
                     key = f"{item['type']}:{item['name']}:{item['line']}"
                     docstrings[key] = doc[:200]
                     break
@@ -154,33 +292,38 @@ def _extract_docstrings(
 
 
 def _categorize_api(items: list[dict[str, Any]]) -> dict[str, dict]:
-    """Categorize API items by type, visibility, and module."""
-    by_type: dict[str, list] = {}
-    by_visibility: dict[str, list] = {}
-    by_module: dict[str, list] = {}
+    """Categorize API items by type, visibility, and module in a single pass.
+    
+    Also returns `type_counts`, a Counter of item types used for the stats.
+    """
+    type_counts: Counter[str] = Counter()
+    by_type: defaultdict[str, list] = defaultdict(list)
+    by_visibility: defaultdict[str, list] = defaultdict(list)
+    by_module: defaultdict[str, list] = defaultdict(list)
+    # Items from the same file share a module, so resolve each path once
+    module_of: dict[str, str] = {}
     
     for item in items:
+        name = item["name"]
         item_type = item["type"]
-        if item_type not in by_type:
-            by_type[item_type] = []
-        by_type[item_type].append(item["name"])
-        
-        vis = item["visibility"]
-        if vis not in by_visibility:
-            by_visibility[vis] = []
-        by_visibility[vis].append(item["name"])
+        type_counts[item_type] += 1
+        by_type[item_type].append(name)
+        by_visibility[item["visibility"]].append(name)
         
-        module = Path(item["file"]).parent.as_posix()
-        if module == ".":
-            module = "root"
-        if module not in by_module:
-            by_module[module] = []
-        by_module[module].append(item["name"])
+        file_path = item["file"]
+        module = module_of.get(file_path)
+        if module is None:
+            module = Path(file_path).parent.as_posix()
+            if module == ".":
+                module = "root"
+            module_of[file_path] = module
+        by_module[module].append(name)
     
     return {
-        "by_type": by_type,
-        "by_visibility": by_visibility,
-        "by_module": by_module,
+        "by_type": dict(by_type),
+        "by_visibility": dict(by_visibility),
+        "by_module": dict(by_module),
+        "type_counts": type_counts,
     }
 
 
@@ -205,7 +348,7 @@ def export_api_surface_report(api: dict[str, Any], output_path: Path) -> None:
     for vis, names in sorted(api["by_visibility"].items()):
         lines.append(f"### `{vis}` ({len(names)} items)")
         lines.append("")
-        for name in sorted(set(names))[:20]:
+        for name in heapq.nsmallest(20, set(names)):
             lines.append(f"- `{name}`")
         if len(names) > 20:
             lines.append(f"- ... and {len(names) - 20} more")
@@ -213,13 +356,14 @@ def export_api_surface_report(api: dict[str, Any], output_path: Path) -> None:
     
     lines.extend(["## By Module", ""])
     
-    for module, names in sorted(api["by_module"].items())[:15]:
+    for module, names in heapq.nsmallest(15, api["by_module"].items()):
         lines.append(f"### `{module}` ({len(names)} items)")
         lines.append("")
-        for name in sorted(set(names))[:10]:
+        for name in heapq.nsmallest(10, set(names)):
             lines.append(f"- `{name}`")
         if len(names) > 10:
             lines.append(f"- ... and {len(names) - 10} more")
         lines.append("")
     
-    output_path.write_text("\n".join(lines))
+    with output_path.open("w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
@@ -7,11 +7,33 @@ Extracts high-level architectural patterns including:
 - Communication patterns between components
 """
 
+import functools
 import json
+import os
+import re
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Iterator
 
+from ._source_walk import walk_rust_files
+
+# Aho-Corasick is optional - it finds every needle in one pass per file
+try:
+    import ahocorasick_rs
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# orjson is optional - it parses cargo metadata several times faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
 
 # Patterns to exclude from source code analysis (test/bench/example files)
 EXCLUDE_PATH_PATTERNS = [
@@ -20,13 +42,18 @@ EXCLUDE_PATH_PATTERNS = [
 ]
 
 
+# EXCLUDE_PATH_PATTERNS as one regex: each pattern anywhere in the path, or
+# the path ending with the pattern minus its slashes
+_EXCLUDE_PATH_RE = re.compile(
+    "|".join(re.escape(pattern) for pattern in EXCLUDE_PATH_PATTERNS)
+    + "|(?:" + "|".join(re.escape(pattern.strip("/")) for pattern in EXCLUDE_PATH_PATTERNS) + r")\Z"
+)
+
+
 def _is_test_file(file_path: Path, project_path: Path) -> bool:
     """Check if a file is a test/bench/example file that should be excluded."""
     rel_path = str(file_path.relative_to(project_path))
-    for pattern in EXCLUDE_PATH_PATTERNS:
-        if pattern in rel_path or rel_path.endswith(pattern.strip("/")):
-            return True
-    return False
+    return _EXCLUDE_PATH_RE.search(rel_path) is not None
 
 
 def _iter_source_files(project_path: Path, include_tests: bool = False) -> Iterator[Path]:
@@ -35,11 +62,46 @@ def _iter_source_files(project_path: Path, include_tests: bool = False) -> Itera
     if not src_path.exists():
         src_path = project_path
     
-    for rs_file in src_path.rglob("*.rs"):
+    for rs_file in walk_rust_files(src_path):
         if include_tests or not _is_test_file(rs_file, project_path):
             yield rs_file
 
 
+@dataclass
+class SourceCache:
+    """Production Rust sources of a project, read once and shared across analyses.
+    
+    Build one with `SourceCache.build()` and pass it to the detectors so a
+    full analysis walks and reads `src/` a single time.
+    """
+    
+    project_path: Path
+    files: list[Path] = field(default_factory=list)
+    contents: dict[Path, bytes] = field(default_factory=dict)
+    
+    @classmethod
+    def build(cls, project_path: Path) -> "SourceCache":
+        """Walk the project once and read every non-test source file as bytes."""
+        files = list(_iter_source_files(project_path, include_tests=False))
+        # File reads release the GIL, so a thread pool overlaps the I/O waits
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+            data = list(pool.map(_read_bytes, files))
+        contents = {
+            rs_file: content
+            for rs_file, content in zip(files, data)
+            if content is not None
+        }
+        return cls(project_path, files, contents)
+
+
+def _read_bytes(path: Path) -> bytes | None:
+    """Read a file, returning None if it cannot be read."""
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
 # Architecture style signatures - enhanced with Rust-specific patterns from research
 ARCHITECTURE_STYLES = {
     "Modular Monolith": {
@@ -93,69 +155,204 @@ COMMUNICATION_PATTERNS = {
 
 
 def analyze_workspace(project_path: Path) -> dict[str, Any]:
-    """Analyze workspace structure using cargo metadata."""
+    """Analyze workspace structure using cargo metadata.
+    
+    Several detectors and diagram generators need the workspace of the same
+    project, so results are memoized per resolved path for the life of the
+    process (one `cargo metadata` run per project). Treat the returned dict
+    as read-only.
+    """
+    return _analyze_workspace_cached(str(Path(project_path).resolve()))
+
+
+@functools.lru_cache(maxsize=16)
+def _analyze_workspace_cached(project_dir: str) -> dict[str, Any]:
+    """Run and summarize `cargo metadata` for one project directory."""
+    project_path = Path(project_dir)
     try:
         result = subprocess.run(
             ["cargo", "metadata", "--format-version", "1", "--no-deps"],
             cwd=project_path,
             capture_output=True,
-            text=True,
             timeout=60,
         )
         if result.returncode != 0:
-            return {"error": result.stderr, "is_workspace": False}
+            return {"error": result.stderr.decode(errors="replace"), "is_workspace": False}
         
-        metadata = json.loads(result.stdout)
-        packages = metadata.get("packages", [])
-        workspace_root = metadata.get("workspace_root", str(project_path))
-        workspace_members = metadata.get("workspace_members", [])
+        packages, workspace_root, workspace_members = _parse_metadata(result.stdout)
         
         return {
             "is_workspace": len(packages) > 1,
-            "workspace_root": workspace_root,
+            "workspace_root": workspace_root or str(project_path),
             "package_count": len(packages),
-            "packages": [
-                {
-                    "name": pkg["name"],
-                    "version": pkg["version"],
-                    "description": pkg.get("description", ""),
-                    "dependencies": [dep["name"] for dep in pkg.get("dependencies", [])],
-                    "features": list(pkg.get("features", {}).keys()),
-                }
-                for pkg in packages
-            ],
+            "packages": packages,
             "workspace_members": workspace_members,
         }
     except (subprocess.TimeoutExpired, FileNotFoundError, json.JSONDecodeError) as e:
         return {"error": str(e), "is_workspace": False}
 
 
-def detect_architecture_style(project_path: Path) -> list[dict[str, Any]]:
+def _summarize_package(pkg: dict[str, Any]) -> dict[str, Any]:
+    """Keep only the cargo metadata fields the analysis uses."""
+    return {
+        "name": pkg["name"],
+        "version": pkg["version"],
+        "description": pkg.get("description", ""),
+        "dependencies": [dep["name"] for dep in pkg.get("dependencies", [])],
+        "features": list(pkg.get("features", {}).keys()),
+    }
+
+
+def _parse_metadata(raw: bytes) -> tuple[list[dict[str, Any]], str | None, list[str]]:
+    """Extract (packages, workspace_root, workspace_members) from cargo metadata."""
+    metadata = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+    return (
+        [_summarize_package(pkg) for pkg in metadata.get("packages", [])],
+        metadata.get("workspace_root"),
+        metadata.get("workspace_members", []),
+    )
+
+
+def _scan_files(cache: SourceCache, needles: dict[str, bytes]) -> dict[str, tuple[int, int]]:
+    """Count substring occurrences across production Rust sources.
+    
+    Each file is searched on its own, so no concatenated copy of the whole
+    codebase is ever built. With ahocorasick_rs installed all needles are
+    matched in a single pass per file; otherwise each needle is counted
+    separately. Counts follow `bytes.count` (non-overlapping per needle).
+    
+    Args:
+        cache: Sources to search
+        needles: Mapping of needle to its encoded bytes
+    
+    Returns:
+        dict mapping each needle to (hit_count, files_with_hit)
+    """
+    encoded = list(needles.values())
+    counts = [0] * len(needles)
+    files_with_hit = [0] * len(needles)
+    automaton = _needle_automaton(tuple(encoded)) if AHOCORASICK_AVAILABLE else None
+    
+    def count_file(content: bytes) -> list[int]:
+        if automaton is None:
+            return [content.count(needle_bytes) for needle_bytes in encoded]
+        file_counts = [0] * len(needles)
+        match_ends = [0] * len(needles)
+        for index, start, end in automaton.find_matches_as_indexes(content, overlapping=True):
+            # Occurrences of the same needle must not overlap, as with count()
+            if start >= match_ends[index]:
+                file_counts[index] += 1
+                match_ends[index] = end
+        return file_counts
+    
+    # The automaton search releases the GIL, so files can be matched on
+    # several cores; bytes.count does not, so that path stays serial
+    workers = os.cpu_count() or 1
+    if automaton is not None and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            per_file = list(pool.map(count_file, cache.contents.values()))
+    else:
+        per_file = map(count_file, cache.contents.values())
+    
+    for file_counts in per_file:
+        for index, count in enumerate(file_counts):
+            if count:
+                counts[index] += count
+                files_with_hit[index] += 1
+    
+    return {
+        needle: (counts[index], files_with_hit[index])
+        for index, needle in enumerate(needles)
+    }
+
+
+def _find_present(cache: SourceCache, needles: dict[str, bytes]) -> set[str]:
+    """Return the needles that occur in at least one production Rust source.
+    
+    Only presence matters here, so a needle is no longer searched for once
+    it has been seen, and no further files are read once every needle has
+    been seen. With ahocorasick_rs installed the single-pass `_scan_files`
+    is already cheaper than searching needle by needle, so it is used as is.
+    
+    Args:
+        cache: Sources to search
+        needles: Mapping of needle to its encoded bytes
+    """
+    if AHOCORASICK_AVAILABLE:
+        return {needle for needle, (count, _) in _scan_files(cache, needles).items() if count}
+    
+    present = set()
+    remaining = dict(needles)
+    for content in cache.contents.values():
+        found = [needle for needle, needle_bytes in remaining.items() if needle_bytes in content]
+        for needle in found:
+            present.add(needle)
+            del remaining[needle]
+        if not remaining:
+            break
+    return present
+
+
+@functools.lru_cache(maxsize=8)
+def _needle_automaton(needles: tuple[bytes, ...]) -> "ahocorasick_rs.BytesAhoCorasick":
+    """Build (once per needle set) an automaton matching all needles."""
+    return ahocorasick_rs.BytesAhoCorasick(list(needles))
+
+
+def _read_cargo_toml(project_path: Path) -> bytes:
+    """Read the project's Cargo.toml, or b"" if it is missing or unreadable."""
+    try:
+        return (project_path / "Cargo.toml").read_bytes()
+    except OSError:
+        return b""
+
+
+# Every substring detect_architecture_style looks for (module counters
+# included), pre-encoded since sources are searched as undecoded bytes
+_STYLE_NEEDLES = {
+    indicator: indicator.encode()
+    for info in ARCHITECTURE_STYLES.values()
+    for indicator in info["indicators"]
+}
+
+_MODULE_NEEDLES = {"mod ": b"mod ", "pub mod ": b"pub mod "}
+
+_COMMUNICATION_NEEDLES = {
+    sig: sig.encode()
+    for signatures in COMMUNICATION_PATTERNS.values()
+    for sig in signatures
+}
+
+
+def detect_architecture_style(
+    project_path: Path, cache: SourceCache | None = None
+) -> list[dict[str, Any]]:
     """Detect architectural patterns used in a project.
     
     Filters out test/bench/example code to reduce false positives.
+    
+    Args:
+        project_path: Path to the Rust project
+        cache: Pre-read sources to reuse; built on demand if omitted
     """
     detected = []
     workspace_info = analyze_workspace(project_path)
-    
-    # Collect production Rust source code (excludes tests/benches/examples)
-    all_code = ""
-    for rs_file in _iter_source_files(project_path, include_tests=False):
-        try:
-            all_code += rs_file.read_text() + "\n"
-        except Exception:
-            continue
-    
-    # Also check Cargo.toml for dependencies
-    cargo_toml = project_path / "Cargo.toml"
-    cargo_content = ""
-    if cargo_toml.exists():
-        try:
-            cargo_content = cargo_toml.read_text()
-        except Exception:
-            pass
-    
-    combined_content = all_code + cargo_content
+    if cache is None:
+        cache = SourceCache.build(project_path)
+    
+    # Indicators named in Cargo.toml (dependency names) need no source
+    # search; the rest only need to be seen once in production sources
+    # (excludes tests/benches/examples)
+    cargo_content = _read_cargo_toml(project_path)
+    present = {
+        indicator for indicator, needle_bytes in _STYLE_NEEDLES.items()
+        if needle_bytes in cargo_content
+    }
+    present |= _find_present(
+        cache,
+        {indicator: needle_bytes for indicator, needle_bytes in _STYLE_NEEDLES.items()
+         if indicator not in present},
+    )
     
     # Check for workspace-based architecture
     if workspace_info.get("is_workspace") and workspace_info.get("package_count", 0) > 3:
@@ -167,7 +364,8 @@ def detect_architecture_style(project_path: Path) -> list[dict[str, Any]]:
         })
     elif not workspace_info.get("is_workspace"):
         # Check if it's a modular monolith
-        module_count = all_code.count("mod ") + all_code.count("pub mod ")
+        module_hits = _scan_files(cache, _MODULE_NEEDLES)
+        module_count = module_hits["mod "][0] + module_hits["pub mod "][0]
         if module_count > 10:
             detected.append({
                 "style": "Modular Monolith",
@@ -182,10 +380,7 @@ def detect_architecture_style(project_path: Path) -> list[dict[str, Any]]:
             continue  # Already checked above
         
         indicators = style_info["indicators"]
-        found_indicators = []
-        for indicator in indicators:
-            if indicator in combined_content:
-                found_indicators.append(indicator)
+        found_indicators = [indicator for indicator in indicators if indicator in present]
         
         if found_indicators:
             confidence = len(found_indicators) / len(indicators)
@@ -202,43 +397,40 @@ def detect_architecture_style(project_path: Path) -> list[dict[str, Any]]:
     return detected
 
 
-def detect_communication_patterns(project_path: Path) -> list[dict[str, Any]]:
+def detect_communication_patterns(
+    project_path: Path, cache: SourceCache | None = None
+) -> list[dict[str, Any]]:
     """Detect communication patterns between components.
     
     Filters out test/bench/example code to reduce false positives.
+    
+    Args:
+        project_path: Path to the Rust project
+        cache: Pre-read sources to reuse; built on demand if omitted
     """
     detected = []
+    if cache is None:
+        cache = SourceCache.build(project_path)
     
-    # Collect production Rust source code (excludes tests/benches/examples)
-    all_code = ""
-    for rs_file in _iter_source_files(project_path, include_tests=False):
-        try:
-            all_code += rs_file.read_text() + "\n"
-        except Exception:
-            continue
-    
-    # Check Cargo.toml for dependencies
-    cargo_toml = project_path / "Cargo.toml"
-    cargo_content = ""
-    if cargo_toml.exists():
-        try:
-            cargo_content = cargo_toml.read_text()
-        except Exception:
-            pass
-    
-    combined = all_code + cargo_content
+    # Production Rust sources (excludes tests/benches/examples), plus
+    # Cargo.toml for dependency names
+    hits = _scan_files(cache, _COMMUNICATION_NEEDLES)
+    cargo_content = _read_cargo_toml(project_path)
     
     for pattern_name, signatures in COMMUNICATION_PATTERNS.items():
         found = []
+        usage_count = 0
         for sig in signatures:
-            if sig in combined:
+            count = hits[sig][0] + cargo_content.count(_COMMUNICATION_NEEDLES[sig])
+            if count:
                 found.append(sig)
+                usage_count += count
         
         if found:
             detected.append({
                 "pattern": pattern_name,
                 "evidence": found,
-                "usage_count": sum(combined.count(sig) for sig in found),
+                "usage_count": usage_count,
             })
     
     detected.sort(key=lambda x: x["usage_count"], reverse=True)
@@ -264,10 +456,11 @@ def generate_c4_context(project_path: Path, project_name: str | None = None) ->
     
     # Add external systems based on dependencies
     if workspace.get("packages"):
+        internal_names = {p["name"] for p in workspace["packages"]}
         external_deps = set()
         for pkg in workspace["packages"]:
             for dep in pkg.get("dependencies", []):
-                if dep not in [p["name"] for p in workspace["packages"]]:
+                if dep not in internal_names:
                     external_deps.add(dep)
         
         # Add notable external dependencies
@@ -307,6 +500,7 @@ def generate_c4_container(project_path: Path, project_name: str | None = None) -
         aux_packages = []
         
         test_patterns = ["test", "bench", "example", "stress", "fuzz"]
+        main_prefix = f"{project_name}-"
         
         for pkg in workspace["packages"]:
             pkg_name = pkg["name"]
@@ -320,7 +514,7 @@ def generate_c4_container(project_path: Path, project_name: str | None = None) -
             
             # Consider core if has description or is main crate
             has_desc = bool(pkg.get("description"))
-            is_main = pkg_name == project_name or pkg_name.startswith(f"{project_name}-")
+            is_main = pkg_name == project_name or pkg_name.startswith(main_prefix)
             
             if is_main or has_desc:
                 core_packages.append(pkg)
@@ -396,17 +590,23 @@ def generate_c4_component(project_path: Path, crate_name: str | None = None) ->
     return "\n".join(lines)
 
 
-def analyze(project_path: Path, include_dynamic: bool = True) -> dict[str, Any]:
+def analyze(
+    project_path: Path, include_dynamic: bool = True, cache: SourceCache | None = None
+) -> dict[str, Any]:
     """Full architecture analysis of a project.
     
     Args:
         project_path: Path to the Rust project
         include_dynamic: Include dynamic analysis (tracing)
+        cache: Pre-read sources to reuse; built on demand if omitted
     """
+    # Read the sources once for every detector below
+    if cache is None:
+        cache = SourceCache.build(project_path)
     result = {
         "workspace": analyze_workspace(project_path),
-        "architecture_styles": detect_architecture_style(project_path),
-        "communication_patterns": detect_communication_patterns(project_path),
+        "architecture_styles": detect_architecture_style(project_path, cache),
+        "communication_patterns": detect_communication_patterns(project_path, cache),
     }
     
     if include_dynamic:
@@ -421,79 +621,57 @@ def export_report(analysis: dict[str, Any], output: Path, project_name: str | No
     if project_name is None:
         project_name = "Project"
     
-    lines = [
-        f"# System Architecture Analysis: {project_name}",
-        "",
-    ]
-    
-    # Workspace info
-    ws = analysis.get("workspace", {})
-    if ws.get("is_workspace"):
-        lines.extend([
-            "## Workspace Structure",
-            "",
-            f"- **Type:** Multi-crate workspace",
-            f"- **Package count:** {ws.get('package_count', 0)}",
-            "",
-            "### Packages",
-            "",
-        ])
-        for pkg in ws.get("packages", []):
-            lines.append(f"- **{pkg['name']}** v{pkg['version']}")
-            if pkg.get("description"):
-                lines.append(f"  - {pkg['description']}")
-            if pkg.get("features"):
-                lines.append(f"  - Features: {', '.join(pkg['features'][:5])}")
-        lines.append("")
-    
-    # Architecture styles
-    styles = analysis.get("architecture_styles", [])
-    if styles:
-        lines.extend([
-            "## Detected Architecture Styles",
-            "",
-        ])
-        for style in styles:
-            lines.append(f"### {style['style']}")
-            lines.append(f"**Confidence:** {style['confidence']:.0%}")
-            lines.append(f"**Description:** {style['description']}")
-            lines.append("")
-            lines.append("**Evidence:**")
-            for e in style["evidence"][:5]:
-                lines.append(f"- {e}")
-            lines.append("")
-    
-    # Communication patterns
-    patterns = analysis.get("communication_patterns", [])
-    if patterns:
-        lines.extend([
-            "## Communication Patterns",
-            "",
-        ])
-        for p in patterns:
-            lines.append(f"- **{p['pattern']}** (found {p['usage_count']} usages)")
-        lines.append("")
-    
-    # Dynamic analysis - tracing
-    tracing = analysis.get("tracing", {})
-    if tracing.get("uses_tracing") or tracing.get("instrumented_count", 0) > 0:
-        lines.extend([
-            "## Runtime Observability",
-            "",
-            f"- **Uses `tracing`:** {'✅' if tracing.get('uses_tracing') else '❌'}",
-            f"- **Uses tokio tracing:** {'✅' if tracing.get('uses_tokio_tracing') else '❌'}",
-            f"- **Instrumented functions:** {tracing.get('instrumented_count', 0)}",
-            "",
-        ])
+    # Sections are written straight into the buffered file as they are
+    # rendered, so no list of lines is built up first. Each section opens
+    # with the blank line that separates it from the previous one.
+    with output.open("w", encoding="utf-8") as f:
+        w = f.write
+        w(f"# System Architecture Analysis: {project_name}\n")
         
-        if tracing.get("instrumented_functions"):
-            lines.append("### Top Instrumented Functions")
-            lines.append("")
-            lines.append("| Function | File |")
-            lines.append("|----------|------|")
-            for f in tracing.get("instrumented_functions", [])[:10]:
-                lines.append(f"| `{f['function']}` | {f['file']} |")
-            lines.append("")
-    
-    output.write_text("\n".join(lines))
-
+        # Workspace info
+        ws = analysis.get("workspace", {})
+        if ws.get("is_workspace"):
+            w("\n## Workspace Structure\n\n")
+            w("- **Type:** Multi-crate workspace\n")
+            w(f"- **Package count:** {ws.get('package_count', 0)}\n\n")
+            w("### Packages\n\n")
+            for pkg in ws.get("packages", []):
+                w(f"- **{pkg['name']}** v{pkg['version']}\n")
+                if pkg.get("description"):
+                    w(f"  - {pkg['description']}\n")
+                if pkg.get("features"):
+                    w(f"  - Features: {', '.join(pkg['features'][:5])}\n")
+        
+        # Architecture styles
+        styles = analysis.get("architecture_styles", [])
+        if styles:
+            w("\n## Detected Architecture Styles\n")
+            for style in styles:
+                w(f"\n### {style['style']}\n")
+                w(f"**Confidence:** {style['confidence']:.0%}\n")
+                w(f"**Description:** {style['description']}\n\n")
+                w("**Evidence:**\n")
+                for e in style["evidence"][:5]:
+                    w(f"- {e}\n")
+        
+        # Communication patterns
+        patterns = analysis.get("communication_patterns", [])
+        if patterns:
+            w("\n## Communication Patterns\n\n")
+            for p in patterns:
+                w(f"- **{p['pattern']}** (found {p['usage_count']} usages)\n")
+        
+        # Dynamic analysis - tracing
+        tracing = analysis.get("tracing", {})
+        if tracing.get("uses_tracing") or tracing.get("instrumented_count", 0) > 0:
+            w("\n## Runtime Observability\n\n")
+            w(f"- **Uses `tracing`:** {'✅' if tracing.get('uses_tracing') else '❌'}\n")
+            w(f"- **Uses tokio tracing:** {'✅' if tracing.get('uses_tokio_tracing') else '❌'}\n")
+            w(f"- **Instrumented functions:** {tracing.get('instrumented_count', 0)}\n")
+            
+            if tracing.get("instrumented_functions"):
+                w("\n### Top Instrumented Functions\n\n")
+                w("| Function | File |\n")
+                w("|----------|------|\n")
+                for f_info in tracing.get("instrumented_functions", [])[:10]:
+                    w(f"| `{f_info['function']}` | {f_info['file']} |\n")
@@ -7,26 +7,89 @@ Provides deeper semantic extraction than regex patterns:
 - Function signatures
 """
 
+import bisect
 import re
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from .architecture import _iter_source_files
+from ._file_cache import FileCache
+from ._source_walk import normalize_newlines
+from .architecture import SourceCache, _iter_source_files
 
 # Tree-sitter is optional - we fall back to enhanced regex if not available
 try:
     import tree_sitter_rust as tsr
     from tree_sitter import Language, Parser
+    _RUST_PARSER = Parser(Language(tsr.language()))
     TREE_SITTER_AVAILABLE = True
-except ImportError:
+except (ImportError, TypeError):
     TREE_SITTER_AVAILABLE = False
 
+# Per-file scan results are cached under RUST_ASR_CACHE_DIR/ast (or
+# ast-tree-sitter, as the two backends report different records); bump when
+# the extracted records change so stale entries are ignored
+CACHE_VERSION = 1
 
-def analyze_ast(project_path: Path) -> dict[str, Any]:
+# Names skipped when collecting function signatures (trivial constructors
+# and conversions)
+_TRIVIAL_FNS = frozenset({"new", "default", "from", "into", "as_ref", "as_mut"})
+
+# Parse-tree nodes whose bodies can declare further items
+_ITEM_CONTAINERS = frozenset({"impl_item", "trait_item", "mod_item", "function_item"})
+
+# Optional visibility prefix shared by the item patterns
+_VIS = rb"(?:pub(?:\([^)]*\))?\s+)?"
+
+# Every construct in one alternation, so each file is scanned once. The
+# alternatives sit inside a lookahead (zero width) so overlapping constructs,
+# such as a derive and the struct it decorates, are all reported; the leading
+# keyword check lets the engine skip positions that cannot start a construct.
+# This stays on the stdlib engine: RE2 has no lookahead, and the `regex`
+# package is slower on this pattern without being any more linear. It runs on
+# the raw bytes; only the captured groups are decoded, and identifiers also
+# accept non-ASCII bytes since a bytes `\w` is ASCII-only.
+_CONSTRUCT_RE = re.compile(
+    rb"(?=#\[derive|impl|pub|struct|enum|async|fn)(?="
+    # `impl<G> Trait<..> for Type<..>`
+    rb"(?P<trait_impl>impl(?:<(?P<ti_generics>[^>]+)>)?\s+(?P<ti_trait>[\w\x80-\xff]+)(?:<[^>]+>)?"
+    rb"\s+for\s+(?P<ti_type>[\w\x80-\xff]+)(?:<(?P<ti_type_generics>[^>]+)>)?)"
+    # `impl<G> Type<..> {`
+    rb"|(?P<inherent_impl>impl(?:<(?P<ii_generics>[^>]+)>)?\s+(?P<ii_type>[\w\x80-\xff]+)"
+    rb"(?:<(?P<ii_type_generics>[^>]+)>)?\s*\{)"
+    # `#[derive(..)]` directly above a struct or enum
+    rb"|(?P<derive>#\[derive\((?P<d_list>[^)]+)\)\]\s*" + _VIS
+    + rb"(?:struct|enum)\s+(?P<d_type>[\w\x80-\xff]+))"
+    # Tuple, braced or unit struct
+    rb"|(?P<struct>" + _VIS + rb"struct\s+(?P<s_name>[\w\x80-\xff]+)(?:<(?P<s_generics>[^>]+)>)?"
+    rb"\s*(?:\([^)]*\)|(?:\{[^}]*\})?|;))"
+    # Enum name and generics
+    rb"|(?P<enum>" + _VIS + rb"enum\s+(?P<e_name>[\w\x80-\xff]+)(?:<(?P<e_generics>[^>]+)>)?)"
+    # Function name, generics, parameters and optional return type
+    rb"|(?P<fn>" + _VIS + rb"(?:async\s+)?fn\s+(?P<f_name>[\w\x80-\xff]+)(?:<(?P<f_generics>[^>]+)>)?"
+    rb"\s*\((?P<f_params>[^)]*)\)(?:\s*->\s*(?P<f_ret>[^{;]+))?)"
+    rb")"
+)
+
+
+def analyze_ast(
+    project_path: Path,
+    cache: SourceCache | None = None,
+    use_cache: bool = True,
+    use_tree_sitter: bool = False,
+) -> dict[str, Any]:
     """
     Perform AST-level analysis on a Rust project.
     
-    Uses tree-sitter if available, otherwise falls back to enhanced regex.
+    Uses the enhanced regex scan by default. The tree-sitter scan handles
+    scoped traits and nested generics better, but is about three times slower.
+    
+    Args:
+        project_path: Path to the Rust project
+        cache: Pre-read sources to reuse; files are read on demand if omitted
+        use_cache: Reuse results for files whose mtime and size are unchanged
+            since the last run
+        use_tree_sitter: Scan with the tree-sitter parser instead of the
+            regex; ignored if tree-sitter is not installed
     
     Returns:
         dict with impl blocks, derives, type definitions, and function signatures
@@ -35,26 +98,39 @@ def analyze_ast(project_path: Path) -> dict[str, Any]:
     derives: list[dict[str, Any]] = []
     type_defs: list[dict[str, Any]] = []
     fn_signatures: list[dict[str, Any]] = []
+    use_tree_sitter = use_tree_sitter and TREE_SITTER_AVAILABLE
+    file_cache = FileCache(
+        "ast-tree-sitter" if use_tree_sitter else "ast",
+        project_path,
+        CACHE_VERSION,
+        enabled=use_cache,
+    )
+    if cache is not None:
+        files = cache.files
+    else:
+        files = list(_iter_source_files(project_path, include_tests=False))
     
-    for rs_file in _iter_source_files(project_path, include_tests=False):
-        try:
-            content = rs_file.read_text(errors="ignore")
-            rel_path = str(rs_file.relative_to(project_path))
-            
-            file_impls = _extract_impl_blocks(content, rel_path)
-            impl_blocks.extend(file_impls)
-            
-            file_derives = _extract_derives(content, rel_path)
-            derives.extend(file_derives)
-            
-            file_types = _extract_type_definitions(content, rel_path)
-            type_defs.extend(file_types)
-            
-            file_fns = _extract_function_signatures(content, rel_path)
-            fn_signatures.extend(file_fns)
-            
-        except Exception:
-            continue
+    for rs_file in files:
+        found = file_cache.get(rs_file)
+        if found is None:
+            try:
+                raw = cache.contents[rs_file] if cache is not None else rs_file.read_bytes()
+                rel_path = str(rs_file.relative_to(project_path))
+                if use_tree_sitter:
+                    found = _scan_constructs_ast(raw, rel_path)
+                else:
+                    found = _scan_constructs(normalize_newlines(raw), rel_path)
+            except Exception:
+                continue
+            file_cache.put(rs_file, found)
+        
+        file_impls, file_derives, file_types, file_fns = found
+        impl_blocks.extend(file_impls)
+        derives.extend(file_derives)
+        type_defs.extend(file_types)
+        fn_signatures.extend(file_fns)
+    
+    file_cache.save()
     
     traits_implemented = _summarize_trait_implementations(impl_blocks)
     derive_usage = _summarize_derive_usage(derives)
@@ -79,146 +155,299 @@ def analyze_ast(project_path: Path) -> dict[str, Any]:
     }
 
 
-def _extract_impl_blocks(content: str, file_path: str) -> list[dict[str, Any]]:
-    """Extract impl blocks, distinguishing trait impls from inherent impls."""
-    impls = []
+def _line_indexer(content: bytes) -> Callable[[int], int]:
+    """Index newline offsets once and return an offset -> 1-based line lookup."""
+    newlines = []
+    i = content.find(b"\n")
+    while i != -1:
+        newlines.append(i)
+        i = content.find(b"\n", i + 1)
     
-    trait_impl_pattern = r"impl(?:<([^>]+)>)?\s+(\w+)(?:<[^>]+>)?\s+for\s+(\w+)(?:<([^>]+)>)?"
-    for match in re.finditer(trait_impl_pattern, content):
-        generics = match.group(1)
-        trait_name = match.group(2)
-        type_name = match.group(3)
-        type_generics = match.group(4)
-        
-        line = content[:match.start()].count("\n") + 1
-        
-        impls.append({
-            "type": type_name,
-            "trait": trait_name,
-            "generics": generics,
-            "type_generics": type_generics,
-            "file": file_path,
-            "line": line,
-            "kind": "trait_impl",
-        })
+    def line_of(offset: int) -> int:
+        # Newlines strictly before the offset, i.e. content[:offset].count(b"\n")
+        return bisect.bisect_left(newlines, offset) + 1
+    
+    return line_of
+
+
+def _group(match: re.Match, name: str) -> str | None:
+    """Decode one captured group, or return None if it did not participate."""
+    value = match.group(name)
+    return value.decode("utf-8", errors="ignore") if value is not None else None
+
+
+def _scan_constructs(
+    content: bytes, file_path: str
+) -> tuple[list[dict], list[dict], list[dict], list[dict]]:
+    """Scan a file's raw bytes once and return (impls, derives, type_defs, functions)."""
+    line_of = _line_indexer(content)
+    found: dict[str, list[dict[str, Any]]] = {kind: [] for kind in _BUILDERS}
+    last_end = dict.fromkeys(_BUILDERS, 0)
     
-    inherent_impl_pattern = r"impl(?:<([^>]+)>)?\s+(\w+)(?:<([^>]+)>)?\s*\{"
-    for match in re.finditer(inherent_impl_pattern, content):
-        if " for " in content[match.start():match.end() + 50]:
+    for match in _CONSTRUCT_RE.finditer(content):
+        kind = match.lastgroup
+        start = match.start()
+        # Keep each kind non-overlapping, as a separate finditer would
+        if start < last_end[kind]:
             continue
+        last_end[kind] = match.end(kind)
         
-        generics = match.group(1)
-        type_name = match.group(2)
-        type_generics = match.group(3)
-        
-        line = content[:match.start()].count("\n") + 1
-        
-        impls.append({
-            "type": type_name,
-            "trait": None,
-            "generics": generics,
-            "type_generics": type_generics,
-            "file": file_path,
-            "line": line,
-            "kind": "inherent_impl",
-        })
+        item = _BUILDERS[kind](match, content, file_path, line_of(start))
+        if item is not None:
+            found[kind].append(item)
     
-    return impls
+    return (
+        found["trait_impl"] + found["inherent_impl"],
+        found["derive"],
+        found["struct"] + found["enum"],
+        found["fn"],
+    )
+
+
+def _build_trait_impl(
+    match: re.Match, content: bytes, file_path: str, line: int
+) -> dict[str, Any]:
+    """Build a trait impl record (`impl Trait for Type`)."""
+    return {
+        "type": _group(match, "ti_type"),
+        "trait": _group(match, "ti_trait"),
+        "generics": _group(match, "ti_generics"),
+        "type_generics": _group(match, "ti_type_generics"),
+        "file": file_path,
+        "line": line,
+        "kind": "trait_impl",
+    }
 
 
-def _extract_derives(content: str, file_path: str) -> list[dict[str, Any]]:
-    """Extract derive attributes with their associated types."""
-    derives = []
+def _build_inherent_impl(
+    match: re.Match, content: bytes, file_path: str, line: int
+) -> dict[str, Any]:
+    """Build an inherent impl record (`impl Type {`).
     
-    derive_pattern = r"#\[derive\(([^)]+)\)\]\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum)\s+(\w+)"
+    The alternation tries trait_impl first, and this alternative requires the
+    `{` right after the type, so a match can never be a trait impl.
+    """
+    return {
+        "type": _group(match, "ii_type"),
+        "trait": None,
+        "generics": _group(match, "ii_generics"),
+        "type_generics": _group(match, "ii_type_generics"),
+        "file": file_path,
+        "line": line,
+        "kind": "inherent_impl",
+    }
+
+
+def _build_derive(
+    match: re.Match, content: bytes, file_path: str, line: int
+) -> dict[str, Any]:
+    """Build a derive record with the list of derived traits."""
+    return {
+        "type": _group(match, "d_type"),
+        "derives": [t.strip() for t in _group(match, "d_list").split(",")],
+        "file": file_path,
+        "line": line,
+    }
+
+
+def _build_struct(
+    match: re.Match, content: bytes, file_path: str, line: int
+) -> dict[str, Any]:
+    """Build a struct definition record."""
+    return {
+        "name": _group(match, "s_name"),
+        "kind": "struct",
+        "generics": _group(match, "s_generics"),
+        "file": file_path,
+        "line": line,
+    }
+
+
+def _build_enum(
+    match: re.Match, content: bytes, file_path: str, line: int
+) -> dict[str, Any]:
+    """Build an enum definition record."""
+    return {
+        "name": _group(match, "e_name"),
+        "kind": "enum",
+        "generics": _group(match, "e_generics"),
+        "file": file_path,
+        "line": line,
+    }
+
+
+def _build_function(
+    match: re.Match, content: bytes, file_path: str, line: int
+) -> dict[str, Any] | None:
+    """Build a function signature record, skipping trivial constructors/conversions."""
+    name = _group(match, "f_name")
+    if name in _TRIVIAL_FNS:
+        return None
     
-    for match in re.finditer(derive_pattern, content):
-        derive_list = match.group(1)
-        type_name = match.group(2)
-        
-        traits = [t.strip() for t in derive_list.split(",")]
-        
-        line = content[:match.start()].count("\n") + 1
-        
-        derives.append({
-            "type": type_name,
-            "derives": traits,
-            "file": file_path,
-            "line": line,
-        })
+    params = _group(match, "f_params")
+    return_type = _group(match, "f_ret")
+    start = match.start()
+    is_async = b"async fn" in content[max(0, start-10):start+10]
     
-    return derives
+    return {
+        "name": name,
+        "generics": _group(match, "f_generics"),
+        "params": params.strip() if params else "",
+        "return_type": return_type.strip() if return_type else None,
+        "is_async": is_async,
+        "file": file_path,
+        "line": line,
+    }
 
 
-def _extract_type_definitions(content: str, file_path: str) -> list[dict[str, Any]]:
-    """Extract struct and enum definitions with their fields/variants."""
-    type_defs = []
-    
-    struct_pattern = r"(?:pub(?:\([^)]*\))?\s+)?struct\s+(\w+)(?:<([^>]+)>)?\s*(?:\([^)]*\)|(?:\{[^}]*\})?|;)"
+# Record builder for each named alternative of _CONSTRUCT_RE
+_BUILDERS: dict[str, Callable[..., dict[str, Any] | None]] = {
+    "trait_impl": _build_trait_impl,
+    "inherent_impl": _build_inherent_impl,
+    "derive": _build_derive,
+    "struct": _build_struct,
+    "enum": _build_enum,
+    "fn": _build_function,
+}
+
+
+def _scan_constructs_ast(
+    raw: bytes, file_path: str
+) -> tuple[list[dict], list[dict], list[dict], list[dict]]:
+    """Collect (impls, derives, type_defs, functions) from the tree-sitter parse tree.
     
-    for match in re.finditer(struct_pattern, content):
-        name = match.group(1)
-        generics = match.group(2)
-        
-        line = content[:match.start()].count("\n") + 1
-        
-        type_defs.append({
-            "name": name,
-            "kind": "struct",
-            "generics": generics,
-            "file": file_path,
-            "line": line,
-        })
+    Records have the same shape as the regex scan's, but come from one C-level
+    parse: scoped traits (`impl fmt::Display for ..`), nested generics and
+    every `#[derive]` stacked on an item are handled. Only item containers
+    (the file and `impl`/`trait`/`mod`/`fn` bodies) are descended, in source
+    order.
+    """
+    # Same line numbering as the regex scan
+    raw = normalize_newlines(raw)
     
-    enum_pattern = r"(?:pub(?:\([^)]*\))?\s+)?enum\s+(\w+)(?:<([^>]+)>)?"
+    impls: list[dict[str, Any]] = []
+    derives: list[dict[str, Any]] = []
+    type_defs: list[dict[str, Any]] = []
+    fns: list[dict[str, Any]] = []
     
-    for match in re.finditer(enum_pattern, content):
-        name = match.group(1)
-        generics = match.group(2)
-        
-        line = content[:match.start()].count("\n") + 1
-        
-        type_defs.append({
-            "name": name,
-            "kind": "enum",
-            "generics": generics,
-            "file": file_path,
-            "line": line,
-        })
+    # One child iterator per open container, so a body is walked as soon as
+    # it is reached and its parent resumes afterwards
+    stack = [iter(_RUST_PARSER.parse(raw).root_node.children)]
+    attributes: list[Any] = []
+    while stack:
+        for node in stack[-1]:
+            kind = node.type
+            if kind == "attribute_item":
+                attributes.append(node)
+                continue
+            if kind in ("line_comment", "block_comment"):
+                continue
+            
+            line = node.start_point[0] + 1
+            if kind == "impl_item":
+                impls.append(_ast_impl(node, file_path, line))
+            elif kind in ("struct_item", "enum_item"):
+                name = _node_text(node.child_by_field_name("name"))
+                type_defs.append({
+                    "name": name,
+                    "kind": "struct" if kind == "struct_item" else "enum",
+                    "generics": _inner_text(node.child_by_field_name("type_parameters")),
+                    "file": file_path,
+                    "line": line,
+                })
+                derives.extend(_ast_derives(attributes, name, file_path))
+            elif kind in ("function_item", "function_signature_item"):
+                fn = _ast_function(node, file_path, line)
+                if fn is not None:
+                    fns.append(fn)
+            attributes = []
+            
+            body = node.child_by_field_name("body") if kind in _ITEM_CONTAINERS else None
+            if body is not None:
+                stack.append(iter(body.children))
+                break
+        else:
+            stack.pop()
     
-    return type_defs
+    return impls, derives, type_defs, fns
 
 
-def _extract_function_signatures(content: str, file_path: str) -> list[dict[str, Any]]:
-    """Extract function signatures with parameters and return types."""
-    functions = []
-    
-    fn_pattern = r"(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+(\w+)(?:<([^>]+)>)?\s*\(([^)]*)\)(?:\s*->\s*([^{;]+))?"
-    
-    for match in re.finditer(fn_pattern, content):
-        name = match.group(1)
-        generics = match.group(2)
-        params = match.group(3)
-        return_type = match.group(4)
-        
-        if name in ["new", "default", "from", "into", "as_ref", "as_mut"]:
+def _node_text(node: Any) -> str | None:
+    """Return a node's source text, or None for a missing node."""
+    if node is None:
+        return None
+    return node.text.decode("utf-8", errors="ignore")
+
+
+def _inner_text(node: Any) -> str | None:
+    """Return the text inside a bracketed node (`<..>`, `(..)`), or None."""
+    text = _node_text(node)
+    return text[1:-1] if text else None
+
+
+def _type_parts(node: Any) -> tuple[str | None, str | None]:
+    """Split a type node into (name, generic arguments), e.g. `io::Result<T>` -> (`Result`, `T`)."""
+    if node is None:
+        return None, None
+    if node.type == "generic_type":
+        name, _ = _type_parts(node.child_by_field_name("type"))
+        return name, _inner_text(node.child_by_field_name("type_arguments"))
+    if node.type in ("scoped_type_identifier", "scoped_identifier"):
+        return _node_text(node.child_by_field_name("name")), None
+    return _node_text(node), None
+
+
+def _ast_impl(node: Any, file_path: str, line: int) -> dict[str, Any]:
+    """Build a trait or inherent impl record from an `impl_item` node."""
+    type_name, type_generics = _type_parts(node.child_by_field_name("type"))
+    trait, _ = _type_parts(node.child_by_field_name("trait"))
+    return {
+        "type": type_name,
+        "trait": trait,
+        "generics": _inner_text(node.child_by_field_name("type_parameters")),
+        "type_generics": type_generics,
+        "file": file_path,
+        "line": line,
+        "kind": "trait_impl" if trait else "inherent_impl",
+    }
+
+
+def _ast_derives(attributes: list[Any], type_name: str | None, file_path: str) -> list[dict[str, Any]]:
+    """Build a derive record for each `#[derive(..)]` among an item's attributes."""
+    records = []
+    for attribute_item in attributes:
+        attribute = attribute_item.named_children[0] if attribute_item.named_children else None
+        if attribute is None or not attribute.named_children:
             continue
-        
-        line = content[:match.start()].count("\n") + 1
-        
-        is_async = "async fn" in content[max(0, match.start()-10):match.start()+10]
-        
-        functions.append({
-            "name": name,
-            "generics": generics,
-            "params": params.strip() if params else "",
-            "return_type": return_type.strip() if return_type else None,
-            "is_async": is_async,
+        path, args = attribute.named_children[0], attribute.named_children[-1]
+        if path.text != b"derive" or args.type != "token_tree":
+            continue
+        records.append({
+            "type": type_name,
+            "derives": [t.strip() for t in _inner_text(args).split(",") if t.strip()],
             "file": file_path,
-            "line": line,
+            "line": attribute_item.start_point[0] + 1,
         })
+    return records
+
+
+def _ast_function(node: Any, file_path: str, line: int) -> dict[str, Any] | None:
+    """Build a function signature record, skipping trivial constructors/conversions."""
+    name = _node_text(node.child_by_field_name("name"))
+    if name in _TRIVIAL_FNS:
+        return None
     
-    return functions
+    modifiers = next((c for c in node.children if c.type == "function_modifiers"), None)
+    return_type = _node_text(node.child_by_field_name("return_type"))
+    return {
+        "name": name,
+        "generics": _inner_text(node.child_by_field_name("type_parameters")),
+        "params": (_inner_text(node.child_by_field_name("parameters")) or "").strip(),
+        "return_type": return_type.strip() if return_type else None,
+        "is_async": modifiers is not None and b"async" in modifiers.text.split(),
+        "file": file_path,
+        "line": line,
+    }
 
 
 def _summarize_trait_implementations(impl_blocks: list[dict]) -> dict[str, list[str]]:
@@ -280,4 +509,5 @@ def export_ast_report(ast_data: dict[str, Any], output_path: Path) -> None:
     for derive, count in list(ast_data["derive_usage"].items())[:10]:
         lines.append(f"- `{derive}`: {count} uses")
     
-    output_path.write_text("\n".join(lines))
+    with output_path.open("w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
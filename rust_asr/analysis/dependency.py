@@ -2,23 +2,30 @@
 
 import subprocess
 import re
+from collections import Counter
 from pathlib import Path
 from typing import Any
 
-import networkx as nx
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    import toml as tomllib
+
+from ._command_cache import run_cached
+
+
+# A DOT edge statement: "source" -> "target"
+_DOT_EDGE_RE = re.compile(r'"([^"]+)"\s*->\s*"([^"]+)"')
+
+# Crate name at the start of a cargo-tree line (after any indentation)
+_CRATE_NAME_RE = re.compile(r"\s*([a-zA-Z0-9_-]+)")
 
 
 def analyze(project_path: Path) -> dict[str, Any]:
     """Analyze project dependencies and build graph."""
-    # Try cargo-depgraph first
+    # Try cargo-depgraph first (output is reused while the manifest is unchanged)
     try:
-        result = subprocess.run(
-            ["cargo", "depgraph", "--all-deps"],
-            cwd=project_path,
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
+        result = run_cached(["cargo", "depgraph", "--all-deps"], project_path)
         if result.returncode == 0:
             return _parse_dot(result.stdout)
     except (subprocess.TimeoutExpired, FileNotFoundError):
@@ -26,13 +33,7 @@ def analyze(project_path: Path) -> dict[str, Any]:
     
     # Fallback to cargo-tree
     try:
-        result = subprocess.run(
-            ["cargo", "tree", "--prefix", "none"],
-            cwd=project_path,
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
+        result = run_cached(["cargo", "tree", "--prefix", "none"], project_path)
         if result.returncode == 0:
             return _parse_tree(result.stdout)
     except (subprocess.TimeoutExpired, FileNotFoundError):
@@ -43,58 +44,62 @@ def analyze(project_path: Path) -> dict[str, Any]:
 
 
 def _parse_dot(dot_output: str) -> dict[str, Any]:
-    """Parse DOT format from cargo-depgraph."""
-    G = nx.DiGraph()
+    """Parse DOT format from cargo-depgraph.
     
-    # Parse nodes
-    node_pattern = r'"([^"]+)"'
-    edge_pattern = r'"([^"]+)"\s*->\s*"([^"]+)"'
+    Nodes keep first-seen order and repeated edges count once; edges are
+    listed grouped by source node.
+    """
+    # Successors per node, both as insertion-ordered dicts
+    successors: dict[str, dict[str, None]] = {}
+    in_degree: Counter[str] = Counter()
     
-    for match in re.finditer(edge_pattern, dot_output):
+    for match in _DOT_EDGE_RE.finditer(dot_output):
         source, target = match.groups()
-        G.add_edge(source, target)
+        targets = successors.setdefault(source, {})
+        successors.setdefault(target, {})
+        if target not in targets:
+            targets[target] = None
+            in_degree[target] += 1
     
     # Calculate in-degree and out-degree
-    nodes = []
-    for node in G.nodes():
-        nodes.append({
-            "name": node,
-            "in_degree": G.in_degree(node),
-            "out_degree": G.out_degree(node),
-        })
+    nodes = [
+        {"name": node, "in_degree": in_degree[node], "out_degree": len(targets)}
+        for node, targets in successors.items()
+    ]
     
-    edges = [{"from": u, "to": v} for u, v in G.edges()]
+    edges = [{"from": u, "to": v} for u, targets in successors.items() for v in targets]
     
     return {"nodes": nodes, "edges": edges}
 
 
 def _parse_tree(tree_output: str) -> dict[str, Any]:
-    """Parse output from cargo-tree."""
-    nodes = set()
+    """Parse output from cargo-tree.
+    
+    Crate names are de-duplicated as the lines stream by, keeping first-seen
+    order.
+    """
+    names: dict[str, None] = {}
     edges = []
     
-    lines = tree_output.strip().split("\n")
-    for line in lines:
+    for line in tree_output.splitlines():
         # Extract crate name
-        match = re.match(r"([a-zA-Z0-9_-]+)", line.strip())
+        match = _CRATE_NAME_RE.match(line)
         if match:
-            nodes.add(match.group(1))
+            names[match.group(1)] = None
     
     return {
-        "nodes": [{"name": n, "in_degree": 0, "out_degree": 0} for n in nodes],
+        "nodes": [{"name": n, "in_degree": 0, "out_degree": 0} for n in names],
         "edges": edges,
     }
 
 
 def _parse_cargo_toml(project_path: Path) -> dict[str, Any]:
     """Parse Cargo.toml for dependencies."""
-    import toml
-    
     cargo_toml = project_path / "Cargo.toml"
     if not cargo_toml.exists():
         return {"nodes": [], "edges": []}
     
-    data = toml.loads(cargo_toml.read_text())
+    data = tomllib.loads(cargo_toml.read_text())
     
     # Get package name
     pkg_name = data.get("package", {}).get("name", project_path.name)
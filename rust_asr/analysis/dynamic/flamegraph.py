@@ -1,24 +1,36 @@
 """Flamegraph generation wrapper for Rust projects."""
 
+import functools
+import heapq
 import subprocess
 import shutil
+from collections.abc import Mapping
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Iterator
+from xml.parsers import expat
 
 from rich.console import Console
 
 console = Console()
 
 
-def check_prerequisites() -> dict[str, bool]:
-    """Check if flamegraph tools are installed."""
+@functools.lru_cache(maxsize=1)
+def check_prerequisites() -> Mapping[str, bool]:
+    """Check if flamegraph tools are installed.
+    
+    Memoized for the life of the process, since each shutil.which walks
+    $PATH; call check_prerequisites.cache_clear() after installing a tool.
+    The result is read-only because it is shared between callers.
+    """
     tools = {
         "cargo-flamegraph": shutil.which("cargo-flamegraph") is not None,
         "perf": shutil.which("perf") is not None,  # Linux
         "dtrace": shutil.which("dtrace") is not None,  # macOS
         "inferno": shutil.which("inferno-flamegraph") is not None,
     }
-    return tools
+    return MappingProxyType(tools)
 
 
 def generate(
@@ -89,42 +101,79 @@ def generate(
 def analyze_hotspots(svg_path: Path) -> list[dict[str, Any]]:
     """Parse flamegraph SVG to extract hot functions.
     
-    Note: This is a simplified parser. For production use,
-    consider using the inferno-flamegraph JSON output.
+    The SVG is streamed and only the 20 widest frames are kept, so memory
+    stays flat however large the profile is.
     """
-    hotspots = []
-    
     if not svg_path.exists():
-        return hotspots
+        return []
     
     try:
-        content = svg_path.read_text()
-        
-        # Simple regex to find function names and widths
-        import re
-        
-        # Look for rect elements with title (function name)
-        pattern = r'<title>([^<]+)</title>\s*<rect[^>]*width="([0-9.]+)"'
-        
-        for match in re.finditer(pattern, content):
-            func_name = match.group(1)
-            width = float(match.group(2))
-            
-            # Filter out very small items
-            if width > 10:
-                hotspots.append({
-                    "function": func_name.split(";")[-1] if ";" in func_name else func_name,
-                    "width": width,
-                    "full_path": func_name,
-                })
-        
-        # Sort by width (hottest first)
-        hotspots.sort(key=lambda x: x["width"], reverse=True)
-        
-    except Exception:
-        pass
+        # Filter out very small items; keep the hottest (widest) first
+        frames = (frame for frame in _iter_frames(svg_path) if frame[1] > 10)
+        top = heapq.nlargest(20, frames, key=itemgetter(1))
+    except OSError:
+        return []
+    
+    return [
+        {
+            "function": func_name.split(";")[-1] if ";" in func_name else func_name,
+            "width": width,
+            "full_path": func_name,
+        }
+        for func_name, width in top
+    ]
+
+
+def _iter_frames(svg_path: Path) -> Iterator[tuple[str, float]]:
+    """Yield (stack, width) for every frame in a flamegraph SVG.
+    
+    A frame is a `<title>` (the stack) followed by a `<rect>` whose width is
+    in pixels (flamegraph.pl) or percent (inferno, as used by
+    cargo-flamegraph). expat callbacks handle elements as they stream past
+    without building a tree; frames found so far are kept if the file turns
+    out to be malformed.
+    """
+    frames: list[tuple[str, float]] = []
+    title_parts: list[str] | None = None
+    title: str | None = None
+    
+    def start_element(name: str, attrs: dict[str, str]) -> None:
+        nonlocal title_parts, title
+        if name == "title":
+            title_parts = []
+            return
+        if name == "rect" and title is not None:
+            try:
+                frames.append((title, float(attrs.get("width", "0").rstrip("%"))))
+            except ValueError:
+                pass
+        title = None
+    
+    def end_element(name: str) -> None:
+        nonlocal title_parts, title
+        if name == "title" and title_parts is not None:
+            title = "".join(title_parts)
+            title_parts = None
+    
+    def character_data(data: str) -> None:
+        if title_parts is not None:
+            title_parts.append(data)
+    
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = character_data
     
-    return hotspots[:20]  # Top 20 hotspots
+    with svg_path.open("rb") as f:
+        try:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                parser.Parse(chunk)
+                yield from frames
+                frames.clear()
+            parser.Parse(b"", True)
+        except expat.ExpatError:
+            pass
+    yield from frames
 
 
 def format_report(hotspots: list[dict[str, Any]], output: Path) -> None:
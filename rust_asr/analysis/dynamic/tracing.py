@@ -1,20 +1,40 @@
 """Tracing and tokio-console integration for async analysis."""
 
+import functools
 import subprocess
 import json
 import re
+import shutil
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    import toml as tomllib
 
-def check_prerequisites() -> dict[str, bool]:
-    """Check if tracing tools are installed."""
-    import shutil
+from .._source_walk import normalize_newlines, walk_rust_files
+
+
+# Literals one of which every match of the source patterns below contains
+_SOURCE_MARKERS = (b"#[instrument", b"info!", b"debug!", b"warn!", b"error!", b"trace!")
+
+# Crates whose macros produce the spans and events scanned for
+_LOGGING_CRATES = frozenset({"tracing", "log"})
+
+
+@functools.lru_cache(maxsize=1)
+def check_prerequisites() -> Mapping[str, bool]:
+    """Check if tracing tools are installed.
     
-    return {
+    Memoized like flamegraph.check_prerequisites; the result is read-only.
+    """
+    return MappingProxyType({
         "tokio-console": shutil.which("tokio-console") is not None,
         "tracing-subscriber": True,  # Usually a crate dependency
-    }
+    })
 
 
 def detect_tracing_usage(project_path: Path) -> dict[str, Any]:
@@ -32,18 +52,29 @@ def detect_tracing_usage(project_path: Path) -> dict[str, Any]:
         content = cargo_toml.read_text()
         result["uses_tracing"] = "tracing" in content
         result["uses_tokio_tracing"] = "tokio" in content and "tracing" in content
+        # Neither tracing nor log is a dependency, so no span or event to find
+        uses_logging = _depends_on_logging(content)
+    else:
+        uses_logging = True
     
     # Scan source for tracing patterns
     src_path = project_path / "src"
     if not src_path.exists():
         return result
+    if not uses_logging:
+        result["instrumented_count"] = 0
+        return result
     
     span_pattern = re.compile(r'#\[instrument[^\]]*\]')
     event_pattern = re.compile(r'(tracing::|log::)?(info|debug|warn|error|trace)!')
     
-    for rs_file in src_path.rglob("*.rs"):
+    for rs_file in walk_rust_files(src_path):
         try:
-            content = rs_file.read_text()
+            raw = rs_file.read_bytes()
+            # Most files hold no span or event at all; skip the regexes for them
+            if not any(marker in raw for marker in _SOURCE_MARKERS):
+                continue
+            content = normalize_newlines(raw).decode("utf-8")
             
             # Find instrumented functions
             for match in span_pattern.finditer(content):
@@ -71,6 +102,31 @@ def detect_tracing_usage(project_path: Path) -> dict[str, Any]:
     return result
 
 
+def _depends_on_logging(cargo_toml: str) -> bool:
+    """Check whether a Cargo.toml lists tracing or log as a (dev-)dependency.
+    
+    Target-specific tables and renamed dependencies (`package = "log"`) count
+    too, as do the tracing and log crates themselves. A manifest that cannot
+    be parsed is assumed to depend on them.
+    """
+    try:
+        manifest = tomllib.loads(cargo_toml)
+    except ValueError:
+        return True
+    if manifest.get("package", {}).get("name") in _LOGGING_CRATES:
+        return True
+    
+    tables = [manifest, *manifest.get("target", {}).values()]
+    for table in tables:
+        for section in ("dependencies", "dev-dependencies"):
+            for name, spec in table.get(section, {}).items():
+                if isinstance(spec, dict):
+                    name = spec.get("package", name)
+                if name in _LOGGING_CRATES:
+                    return True
+    return False
+
+
 def parse_tokio_console_dump(dump_path: Path) -> dict[str, Any]:
     """Parse tokio-console JSON dump for async task analysis."""
     result = {
@@ -1,9 +1,112 @@
 """Knowledge Graph extraction from Rust codebase."""
 
 import json
+import mmap
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
+
+from ._source_walk import normalize_newlines, walk_rust_files
+
+# orjson is optional - it writes large graphs much faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Below this many files, scan serially instead of starting a process pool
+PARALLEL_MIN_FILES = 8
+
+# Files at least this large are memory-mapped rather than read into a bytes copy
+MMAP_MIN_SIZE = 256 * 1024
+
+
+# All patterns run on raw bytes and use ASCII-only \s/\w: Rust keywords and
+# nearly all identifiers are ASCII, and only captured names are decoded
+
+# Optional visibility prefix of an entity definition, captured as `<type>_vis`
+_VIS = rb"(?:(?P<%s_vis>pub(?:\([^)]+\))?)\s+)?"
+
+# Qualifiers between a function's visibility and `fn`
+_FN_QUALIFIERS = rb'(?:(?:const|async|unsafe|extern(?:\s+"[^"]*")?)\s+)*'
+
+# Every entity definition in one alternation, so each file is scanned once.
+# The alternatives sit inside a lookahead (zero width) so every position is
+# still tried, as separate per-type scans would; the leading keyword check
+# skips positions that cannot start a definition. `<type>_name` is the name.
+_ENTITY_RE = re.compile(
+    rb"(?=pub|struct|enum|trait|impl|async|fn)(?="
+    rb"(?P<struct>" + _VIS % b"struct" + rb"struct\s+(?P<struct_name>\w+))"
+    rb"|(?P<enum>" + _VIS % b"enum" + rb"enum\s+(?P<enum_name>\w+))"
+    rb"|(?P<trait>" + _VIS % b"trait" + rb"trait\s+(?P<trait_name>\w+))"
+    rb"|(?P<impl>impl(?:<[^>]+>)?\s+(?P<impl_name>\w+))"
+    rb"|(?P<fn>" + _VIS % b"fn" + _FN_QUALIFIERS + rb"fn\s+(?P<fn_name>\w+))"
+    rb")",
+    re.ASCII,
+)
+
+# Entity types in reporting order (earlier types win duplicate names)
+_ENTITY_TYPES = ("struct", "enum", "trait", "impl", "fn")
+
+# Names never reported as entities
+_SKIPPED_NAMES = frozenset({"self", "Self", "new", "default", "from", "into"})
+
+# Trait implementations: impl Trait for Type
+_IMPL_FOR_RE = re.compile(rb"impl(?:<[^>]+>)?\s+(\w+)(?:<[^>]+>)?\s+for\s+(\w+)", re.ASCII)
+
+# Derive attributes: #[derive(Trait1, Trait2)] on a struct or enum
+_DERIVE_RE = re.compile(rb"#\[derive\(([^)]+)\)\]\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum)\s+(\w+)", re.ASCII)
+
+# Module declarations: mod name { ... } or pub mod name;
+_MOD_RE = re.compile(rb"(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)", re.ASCII)
+
+# Use/import paths, without a leading crate::
+_USE_RE = re.compile(rb"use\s+(?:crate::)?([a-zA-Z_][a-zA-Z0-9_:]*)", re.ASCII)
+
+# Field and parameter type references; group(2) is the (unwrapped) type
+_FIELD_RE = re.compile(rb"(\w+)\s*:\s*(?:&)?(?:mut\s+)?(?:Option<|Vec<|Box<|Arc<|Rc<)?(\w+)", re.ASCII)
+
+# Module path keywords, in priority order, and the layer each one implies
+_LAYER_KEYWORDS = {
+    "domain": "Domain Layer",
+    "entity": "Domain Layer",
+    "model": "Domain Layer",
+    "service": "Application Layer",
+    "application": "Application Layer",
+    "handler": "Application Layer",
+    "repo": "Infrastructure Layer",
+    "db": "Infrastructure Layer",
+    "storage": "Infrastructure Layer",
+    "api": "Interface Layer",
+    "http": "Interface Layer",
+    "web": "Interface Layer",
+    "util": "Utilities",
+    "common": "Utilities",
+    "helper": "Utilities",
+}
+
+# Every keyword occurrence in one scan; the lookahead is zero width, so
+# overlapping keywords are all found
+_LAYER_RE = re.compile("(?=(" + "|".join(_LAYER_KEYWORDS) + "))")
+
+# Built-in types never treated as references to project entities
+_PRIMITIVES = frozenset({
+    "str", "String", "usize", "isize", "i8", "i16", "i32", "i64",
+    "u8", "u16", "u32", "u64", "f32", "f64", "bool", "char", "Self",
+})
+
+
+class _Edge(NamedTuple):
+    """A graph edge; turned into its JSON dict once the graph is assembled."""
+    frm: str
+    to: str
+    relationship: str
+    source: str
 
 
 def build_knowledge_graph(project_path: Path) -> dict[str, Any]:
@@ -17,42 +120,50 @@ def build_knowledge_graph(project_path: Path) -> dict[str, Any]:
         dict with nodes, edges, and clusters
     """
     nodes: list[dict[str, Any]] = []
-    edges: list[dict[str, Any]] = []
+    edges: list[_Edge] = []
     
-    entity_map: dict[str, dict[str, Any]] = {}
+    # Names of the entities added so far (the first definition of a name wins)
+    known_ids: set[str] = set()
     
     src_paths = [project_path / "src"]
     if not src_paths[0].exists():
         src_paths = [project_path]
     
-    for src_path in src_paths:
-        for rs_file in src_path.rglob("*.rs"):
-            if "target" in rs_file.parts:
-                continue
-            
-            try:
-                content = rs_file.read_text(errors="ignore")
-                rel_path = str(rs_file.relative_to(project_path))
-                
-                file_entities = _extract_entities(content, rel_path)
-                for entity in file_entities:
-                    entity_id = f"{entity['name']}"
-                    if entity_id not in entity_map:
-                        entity_map[entity_id] = entity
-                        nodes.append(entity)
-                
-                file_edges = _extract_relationships(content, rel_path, entity_map)
-                edges.extend(file_edges)
-                
-            except Exception:
-                continue
-    
-    clusters = _identify_clusters(nodes, edges)
+    rs_files = [rs_file for src_path in src_paths for rs_file in walk_rust_files(src_path)]
+    
+    # Scanning is regex-bound, so spread files across processes; for a
+    # handful of files the pool start-up would cost more than it saves
+    if len(rs_files) < PARALLEL_MIN_FILES:
+        scanned = [_scan_file(rs_file, project_path) for rs_file in rs_files]
+    else:
+        with ProcessPoolExecutor() as pool:
+            scanned = list(pool.map(_scan_file, rs_files, repeat(project_path), chunksize=16))
+    
+    # Merge in file order: `uses`/`references` edges only point at entities
+    # defined in this or an earlier file, as when files were scanned serially
+    for result in scanned:
+        if result is None:
+            continue
+        rel_path, file_entities, file_edges, imported_names, field_types = result
+        
+        for entity in file_entities:
+            entity_id = entity["id"]
+            if entity_id not in known_ids:
+                known_ids.add(entity_id)
+                nodes.append(entity)
+        
+        edges.extend(file_edges)
+        edges.extend(_link_references(rel_path, imported_names, field_types, known_ids))
+    
+    clusters = _identify_clusters(nodes)
     
     return {
         "project": project_path.name,
         "nodes": nodes,
-        "edges": edges,
+        "edges": [
+            {"from": e.frm, "to": e.to, "relationship": e.relationship, "source": e.source}
+            for e in edges
+        ],
         "clusters": clusters,
         "stats": {
             "total_nodes": len(nodes),
@@ -62,143 +173,165 @@ def build_knowledge_graph(project_path: Path) -> dict[str, Any]:
     }
 
 
-def _extract_entities(content: str, file_path: str) -> list[dict[str, Any]]:
-    """Extract struct, enum, trait, and function definitions."""
-    entities = []
+def _scan_file(
+    rs_file: Path, project_path: Path
+) -> tuple[str, list[dict], list[_Edge], list[str], list[str]] | None:
+    """Read and scan one source file (runs in a worker).
     
-    patterns = {
-        "struct": r"(?:pub(?:\([^)]+\))?\s+)?struct\s+(\w+)",
-        "enum": r"(?:pub(?:\([^)]+\))?\s+)?enum\s+(\w+)",
-        "trait": r"(?:pub(?:\([^)]+\))?\s+)?trait\s+(\w+)",
-        "impl": r"impl(?:<[^>]+>)?\s+(\w+)",
-        "fn": r"(?:pub(?:\([^)]+\))?\s+)?(?:async\s+)?fn\s+(\w+)",
-    }
+    Returns:
+        (rel_path, entities, edges, imported_names, field_types), or None if
+        the file could not be processed
+    """
+    try:
+        rel_path = str(rs_file.relative_to(project_path))
+        with open(rs_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_MIN_SIZE:
+                # Pages are faulted in as the regexes reach them; mmap needs a
+                # non-empty file, which the size check guarantees
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if mm.find(b"\r") == -1:
+                        return _scan_content(mm, rel_path)
+            content = f.read()
+        return _scan_content(normalize_newlines(content), rel_path)
+    except Exception:
+        return None
+
+
+def _scan_content(
+    content: bytes | mmap.mmap, rel_path: str
+) -> tuple[str, list[dict], list[_Edge], list[str], list[str]]:
+    """Scan the newline-normalized content of one file."""
+    entities = _extract_entities(content, rel_path)
+    edges, imported_names, field_types = _extract_relationships(content, rel_path)
+    return rel_path, entities, edges, imported_names, field_types
+
+
+def _extract_entities(content: bytes | mmap.mmap, file_path: str) -> list[dict[str, Any]]:
+    """Extract struct, enum, trait, and function definitions."""
+    found: dict[str, list[dict[str, Any]]] = {entity_type: [] for entity_type in _ENTITY_TYPES}
+    last_end = dict.fromkeys(_ENTITY_TYPES, 0)
     
-    for entity_type, pattern in patterns.items():
-        for match in re.finditer(pattern, content):
-            name = match.group(1)
-            
-            if name in ["self", "Self", "new", "default", "from", "into"]:
-                continue
-            
-            visibility = "pub" if "pub " in content[max(0, match.start()-10):match.start()+10] else "private"
-            
-            entities.append({
-                "id": name,
-                "name": name,
-                "type": entity_type,
-                "module": file_path,
-                "visibility": visibility,
-            })
+    for match in _ENTITY_RE.finditer(content):
+        entity_type = match.lastgroup
+        start = match.start()
+        # Keep each type non-overlapping, as a separate finditer would
+        if start < last_end[entity_type]:
+            continue
+        last_end[entity_type] = match.end(entity_type)
+        
+        name = match.group(f"{entity_type}_name").decode("ascii")
+        if name in _SKIPPED_NAMES:
+            continue
+        
+        # impl blocks carry no visibility of their own
+        is_pub = entity_type != "impl" and match.group(f"{entity_type}_vis")
+        visibility = "pub" if is_pub else "private"
+        
+        found[entity_type].append({
+            "id": name,
+            "name": name,
+            "type": entity_type,
+            "module": file_path,
+            "visibility": visibility,
+        })
     
+    entities = []
+    for entity_type in _ENTITY_TYPES:
+        entities.extend(found[entity_type])
     return entities
 
 
 def _extract_relationships(
-    content: str,
+    content: bytes | mmap.mmap,
     file_path: str,
-    entity_map: dict[str, dict[str, Any]],
-) -> list[dict[str, Any]]:
-    """Extract relationships between entities with semantic edge types."""
+) -> tuple[list[_Edge], list[str], list[str]]:
+    """Extract relationships between entities with semantic edge types.
+    
+    `uses` and `references` edges depend on which entities are known, so
+    they are returned as candidates for `_link_references`.
+    
+    Returns:
+        (edges, imported_names, field_types)
+    """
     edges = []
+    imported_names = []
+    field_types = []
+    module_name = _module_name(file_path)
     
     # Trait implementations: impl Trait for Type
-    impl_pattern = r"impl(?:<[^>]+>)?\s+(\w+)(?:<[^>]+>)?\s+for\s+(\w+)"
-    for match in re.finditer(impl_pattern, content):
-        trait_name = match.group(1)
-        struct_name = match.group(2)
-        edges.append({
-            "from": struct_name,
-            "to": trait_name,
-            "relationship": "implements",
-            "source": file_path,
-        })
+    for match in _IMPL_FOR_RE.finditer(content):
+        trait_name = match.group(1).decode("ascii")
+        struct_name = match.group(2).decode("ascii")
+        edges.append(_Edge(struct_name, trait_name, "implements", file_path))
     
     # Derive attributes: #[derive(Trait1, Trait2)]
-    derive_pattern = r"#\[derive\(([^)]+)\)\]\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum)\s+(\w+)"
-    for match in re.finditer(derive_pattern, content):
-        derives = [t.strip() for t in match.group(1).split(",")]
-        type_name = match.group(2)
-        for derive_trait in derives:
-            edges.append({
-                "from": type_name,
-                "to": derive_trait,
-                "relationship": "derives",
-                "source": file_path,
-            })
+    for match in _DERIVE_RE.finditer(content):
+        derives = match.group(1).decode("utf-8", errors="ignore")
+        type_name = match.group(2).decode("ascii")
+        # Strip while emitting instead of building a stripped list first
+        for derive_trait in derives.split(","):
+            edges.append(_Edge(type_name, derive_trait.strip(), "derives", file_path))
     
     # Module containment: mod name { ... } or pub mod name;
-    module_stack = [Path(file_path).stem]
-    mod_pattern = r"(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)"
-    for match in re.finditer(mod_pattern, content):
-        mod_name = match.group(1)
-        parent = module_stack[-1] if module_stack else "root"
-        edges.append({
-            "from": parent,
-            "to": mod_name,
-            "relationship": "contains",
-            "source": file_path,
-        })
+    for match in _MOD_RE.finditer(content):
+        mod_name = match.group(1).decode("ascii")
+        edges.append(_Edge(module_name, mod_name, "contains", file_path))
     
     # Use/import relationships
-    use_pattern = r"use\s+(?:crate::)?([a-zA-Z_][a-zA-Z0-9_:]*)"
-    for match in re.finditer(use_pattern, content):
+    for match in _USE_RE.finditer(content):
         import_path = match.group(1)
-        parts = import_path.split("::")
+        parts = import_path.split(b"::")
         if parts:
-            imported = parts[-1]
-            if imported in entity_map:
-                module_name = Path(file_path).stem
-                edges.append({
-                    "from": module_name,
-                    "to": imported,
-                    "relationship": "uses",
-                    "source": file_path,
-                })
+            imported_names.append(parts[-1].decode("ascii"))
     
     # Field type references
-    field_pattern = r"(\w+)\s*:\s*(?:&)?(?:mut\s+)?(?:Option<|Vec<|Box<|Arc<|Rc<)?(\w+)"
-    for match in re.finditer(field_pattern, content):
-        field_type = match.group(2)
-        primitives = {"str", "String", "usize", "isize", "i8", "i16", "i32", "i64", 
-                      "u8", "u16", "u32", "u64", "f32", "f64", "bool", "char", "Self"}
-        if field_type in entity_map and field_type not in primitives:
-            edges.append({
-                "from": "field_usage",
-                "to": field_type,
-                "relationship": "references",
-                "source": file_path,
-            })
+    for match in _FIELD_RE.finditer(content):
+        field_type = match.group(2).decode("ascii")
+        if field_type not in _PRIMITIVES:
+            field_types.append(field_type)
+    
+    return edges, imported_names, field_types
+
+
+def _link_references(
+    file_path: str,
+    imported_names: list[str],
+    field_types: list[str],
+    known_ids: set[str],
+) -> list[_Edge]:
+    """Build `uses` and `references` edges to entities already in the graph."""
+    edges = []
+    module_name = _module_name(file_path)
+    
+    for imported in imported_names:
+        if imported in known_ids:
+            edges.append(_Edge(module_name, imported, "uses", file_path))
+    
+    for field_type in field_types:
+        if field_type in known_ids:
+            edges.append(_Edge("field_usage", field_type, "references", file_path))
     
     return edges
 
 
-def _identify_clusters(
-    nodes: list[dict[str, Any]],
-    edges: list[dict[str, Any]],
-) -> list[dict[str, Any]]:
+def _module_name(file_path: str) -> str:
+    """File name without its extension, as Path(file_path).stem but without a Path."""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def _identify_clusters(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Identify logical clusters/layers based on module paths and relationships."""
     clusters: dict[str, list[str]] = {}
+    # Most files define several entities, so classify each module once
+    module_layers: dict[str, str] = {}
     
     for node in nodes:
         module = node.get("module", "")
         
-        if "domain" in module or "entity" in module or "model" in module:
-            layer = "Domain Layer"
-        elif "service" in module or "application" in module or "handler" in module:
-            layer = "Application Layer"
-        elif "repo" in module or "db" in module or "storage" in module:
-            layer = "Infrastructure Layer"
-        elif "api" in module or "http" in module or "web" in module:
-            layer = "Interface Layer"
-        elif "util" in module or "common" in module or "helper" in module:
-            layer = "Utilities"
-        else:
-            parts = module.split("/")
-            if len(parts) > 1:
-                layer = f"Module: {parts[-2] if parts[-1].endswith('.rs') else parts[-1]}"
-            else:
-                layer = "Core"
+        layer = module_layers.get(module)
+        if layer is None:
+            layer = module_layers[module] = _classify_module(module)
         
         if layer not in clusters:
             clusters[layer] = []
@@ -210,9 +343,29 @@ def _identify_clusters(
     ]
 
 
+def _classify_module(module: str) -> str:
+    """Name the layer of a module path; the first matching _LAYER_KEYWORDS entry wins."""
+    found = set(_LAYER_RE.findall(module))
+    if found:
+        for keyword, layer in _LAYER_KEYWORDS.items():
+            if keyword in found:
+                return layer
+    
+    parts = module.split("/")
+    if len(parts) > 1:
+        return f"Module: {parts[-2] if parts[-1].endswith('.rs') else parts[-1]}"
+    return "Core"
+
+
 def export_knowledge_graph(graph: dict[str, Any], output_path: Path) -> None:
     """Export knowledge graph to JSON file."""
-    output_path.write_text(json.dumps(graph, indent=2))
+    if ORJSON_AVAILABLE:
+        output_path.write_bytes(orjson.dumps(graph, option=orjson.OPT_INDENT_2))
+        return
+    # json.dump writes the encoder's chunks as they come instead of joining
+    # the whole document into one string first
+    with output_path.open("w") as f:
+        json.dump(graph, f, indent=2)
 
 
 def export_knowledge_graph_summary(graph: dict[str, Any], output_path: Path) -> None:
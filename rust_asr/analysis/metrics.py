@@ -2,9 +2,24 @@
 
 import subprocess
 import json
+import re
 from pathlib import Path
 from typing import Any
 
+from ._command_cache import run_cached
+from ._source_walk import normalize_newlines, walk_rust_files
+
+
+# Both patterns match a line including the newline before it (content gets
+# one prepended), so the engine can jump between newlines instead of trying
+# a `^` anchor at every byte
+
+# Lines that are empty once surrounding whitespace is stripped
+_BLANK_LINE_RE = re.compile(rb"\n[ \t\r\f\v]*(?=\n|\Z)")
+
+# Lines whose first non-blank characters open a comment
+_COMMENT_LINE_RE = re.compile(rb"\n[ \t\r\f\v]*/[/*]")
+
 
 def analyze(project_path: Path) -> dict[str, Any]:
     """Collect code metrics for a project."""
@@ -16,14 +31,10 @@ def analyze(project_path: Path) -> dict[str, Any]:
         "rust_files": 0,
     }
     
-    # Try tokei first (most accurate)
+    # Try tokei first (most accurate; output is reused within a run). It runs
+    # inside the project, so the target is "." rather than a relative path
     try:
-        result = subprocess.run(
-            ["tokei", "--output", "json", str(project_path)],
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
+        result = run_cached(["tokei", "--output", "json", "."], project_path)
         if result.returncode == 0:
             data = json.loads(result.stdout)
             
@@ -62,25 +73,25 @@ def _manual_count(project_path: Path) -> dict[str, Any]:
     if not src_path.exists():
         src_path = project_path
     
-    for rs_file in src_path.rglob("*.rs"):
+    for rs_file in walk_rust_files(src_path):
         stats["rust_files"] += 1
         
         try:
-            content = rs_file.read_text()
-            lines = content.split("\n")
-            
-            for line in lines:
-                stripped = line.strip()
-                stats["lines"] += 1
-                
-                if not stripped:
-                    stats["blanks"] += 1
-                elif stripped.startswith("//") or stripped.startswith("/*"):
-                    stats["comments"] += 1
-                else:
-                    stats["code"] += 1
-        except Exception:
+            content = rs_file.read_bytes()
+        except OSError:
             continue
+        
+        # Classify all lines with C-level scans rather than a Python loop;
+        # like split("\n"), a trailing newline ends in one more (blank) line
+        content = b"\n" + normalize_newlines(content)
+        lines = content.count(b"\n")
+        blanks = len(_BLANK_LINE_RE.findall(content))
+        comments = len(_COMMENT_LINE_RE.findall(content))
+        
+        stats["lines"] += lines
+        stats["blanks"] += blanks
+        stats["comments"] += comments
+        stats["code"] += lines - blanks - comments
     
     return stats
 
@@ -6,6 +6,10 @@ from pathlib import Path
 from typing import Any
 
 
+# Public item definitions; one is enough to call a module public
+_PUB_ITEM_RE = re.compile(r"\bpub\s+(?:fn|struct|enum|trait|mod|type|const|static)")
+
+
 def analyze(project_path: Path, public_only: bool = False) -> dict[str, Any]:
     """Analyze module structure of a Rust project."""
     # Try cargo-modules first
@@ -79,36 +83,43 @@ def _parse_file_structure(project_path: Path) -> dict[str, Any]:
     
     root = {"name": project_path.name, "visibility": "pub", "children": []}
     
-    # Find all .rs files
-    for rs_file in src_path.rglob("*.rs"):
+    # Find all .rs files (except lib.rs/main.rs at root level)
+    rs_files = [
+        rs_file for rs_file in src_path.rglob("*.rs")
+        if rs_file.parent != src_path or rs_file.name not in ("lib.rs", "main.rs")
+    ]
+    
+    # Read every file once up front
+    visibilities = {rs_file: _detect_visibility(rs_file) for rs_file in rs_files}
+    
+    # First node of each name under each parent, keyed by its name path from
+    # the root; file nodes count too, so foo/bar.rs nests under foo.rs
+    nodes_by_path: dict[tuple[str, ...], dict[str, Any]] = {}
+    
+    for rs_file in rs_files:
         rel_path = rs_file.relative_to(src_path)
-        parts = list(rel_path.parts)
-        
-        # Skip lib.rs/main.rs at root level
-        if len(parts) == 1 and parts[0] in ("lib.rs", "main.rs"):
-            continue
+        parts = rel_path.parts
         
         # Navigate/create path
         current = root
         for i, part in enumerate(parts[:-1]):
             # Find or create directory node
-            existing = next((c for c in current["children"] if c["name"] == part), None)
+            key = parts[:i + 1]
+            existing = nodes_by_path.get(key)
             if existing:
                 current = existing
             else:
-                node = {"name": part, "visibility": _detect_visibility(rs_file), "children": []}
+                node = {"name": part, "visibility": visibilities[rs_file], "children": []}
                 current["children"].append(node)
+                nodes_by_path[key] = node
                 current = node
         
         # Add file node
         file_name = parts[-1].replace(".rs", "")
         if file_name not in ("mod", "lib", "main"):
-            visibility = _detect_visibility(rs_file)
-            current["children"].append({
-                "name": file_name,
-                "visibility": visibility,
-                "children": [],
-            })
+            node = {"name": file_name, "visibility": visibilities[rs_file], "children": []}
+            current["children"].append(node)
+            nodes_by_path.setdefault((*parts[:-1], file_name), node)
     
     return root
 
@@ -117,9 +128,8 @@ def _detect_visibility(rs_file: Path) -> str:
     """Detect visibility of a module from its file content."""
     try:
         content = rs_file.read_text()
-        # Simple heuristic: count pub items
-        pub_count = len(re.findall(r"\bpub\s+(?:fn|struct|enum|trait|mod|type|const|static)", content))
-        if pub_count > 0:
+        # Simple heuristic: any pub item makes the module public
+        if _PUB_ITEM_RE.search(content):
             return "pub"
         return "private"
     except Exception:
@@ -132,15 +142,27 @@ def export_tree(tree: dict[str, Any], output: Path) -> None:
     _tree_to_lines(tree, lines, 0)
     lines.append("```")
     
-    output.write_text("\n".join(lines))
+    output.write_bytes("\n".join(lines).encode("utf-8"))
 
 
 def _tree_to_lines(node: dict[str, Any], lines: list[str], depth: int) -> None:
-    """Convert tree node to lines."""
-    indent = "  " * depth
-    visibility = node.get("visibility", "")
-    vis_marker = f" ({visibility})" if visibility else ""
-    lines.append(f"{indent}└── {node['name']}{vis_marker}")
+    """Convert tree node to lines.
     
-    for child in node.get("children", []):
-        _tree_to_lines(child, lines, depth + 1)
+    Walks depth-first with a stack of child iterators instead of recursing,
+    so deeply nested module trees cannot hit the recursion limit; a node's
+    depth is the base depth plus the number of open iterators.
+    """
+    stack = []
+    while node is not None:
+        indent = "  " * (depth + len(stack))
+        visibility = node.get("visibility", "")
+        vis_marker = f" ({visibility})" if visibility else ""
+        lines.append(f"{indent}└── {node['name']}{vis_marker}")
+        
+        stack.append(iter(node.get("children", ())))
+        node = None
+        while stack:
+            node = next(stack[-1], None)
+            if node is not None:
+                break
+            stack.pop()
@@ -1,5 +1,6 @@
 """Pattern cross-reference analysis across multiple projects."""
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any
 
@@ -19,32 +20,18 @@ def compare_patterns(project_paths: list[Path]) -> dict[str, Any]:
     all_patterns = set()
     all_styles = set()
     
-    for project_path in project_paths:
-        project_name = project_path.name
-        
-        # Detect architecture styles
-        styles = architecture.detect_architecture_style(project_path)
-        
-        # Detect design patterns
-        design_patterns = patterns.analyze(project_path)
-        
-        # Detect communication patterns
-        comm = architecture.detect_communication_patterns(project_path)
-        
-        # Analyze workspace
-        workspace = architecture.analyze_workspace(project_path)
-        
-        results[project_name] = {
-            "styles": [s["style"] for s in styles],
-            "style_details": styles,
-            "design_patterns": [p["name"] for p in design_patterns],
-            "pattern_details": design_patterns,
-            "communication": [c["pattern"] for c in comm],
-            "crate_count": workspace.get("package_count", 1),
-        }
-        
-        all_styles.update(s["style"] for s in styles)
-        all_patterns.update(p["name"] for p in design_patterns)
+    # Projects are independent and their scans are CPU-bound, so analyze
+    # them in separate processes; results are merged in input order
+    if len(project_paths) < 2:
+        analyzed = [_analyze_project(project_path) for project_path in project_paths]
+    else:
+        with ProcessPoolExecutor() as pool:
+            analyzed = list(pool.map(_analyze_project, project_paths))
+    
+    for project_path, project in zip(project_paths, analyzed):
+        results[project_path.name] = project
+        all_styles.update(project["styles"])
+        all_patterns.update(project["design_patterns"])
     
     return {
         "projects": results,
@@ -53,6 +40,31 @@ def compare_patterns(project_paths: list[Path]) -> dict[str, Any]:
     }
 
 
+def _analyze_project(project_path: Path) -> dict[str, Any]:
+    """Run every detector on one project (runs in a worker)."""
+    # Detect architecture styles (sources are read once for all detectors)
+    sources = architecture.SourceCache.build(project_path)
+    styles = architecture.detect_architecture_style(project_path, sources)
+    
+    # Detect design patterns
+    design_patterns = patterns.analyze(project_path, sources)
+    
+    # Detect communication patterns
+    comm = architecture.detect_communication_patterns(project_path, sources)
+    
+    # Analyze workspace
+    workspace = architecture.analyze_workspace(project_path)
+    
+    return {
+        "styles": [s["style"] for s in styles],
+        "style_details": styles,
+        "design_patterns": [p["name"] for p in design_patterns],
+        "pattern_details": design_patterns,
+        "communication": [c["pattern"] for c in comm],
+        "crate_count": workspace.get("package_count", 1),
+    }
+
+
 def generate_comparison_matrix(comparison: dict[str, Any]) -> str:
     """Generate markdown comparison table.
     
@@ -71,8 +83,20 @@ def generate_comparison_matrix(comparison: dict[str, Any]) -> str:
         "",
     ]
     
+    project_data = comparison["projects"]
+    projects = list(project_data.keys())
+    
+    # Per-project lookups, built once instead of scanning lists in every cell
+    style_sets = {proj: set(data["styles"]) for proj, data in project_data.items()}
+    # reversed() so the first entry for a style wins, as a forward scan would
+    confidences = {
+        proj: {s["style"]: s["confidence"] for s in reversed(data["style_details"])}
+        for proj, data in project_data.items()
+    }
+    pattern_sets = {proj: set(data["design_patterns"]) for proj, data in project_data.items()}
+    comm_sets = {proj: set(data["communication"]) for proj, data in project_data.items()}
+    
     # Architecture styles table
-    projects = list(comparison["projects"].keys())
     all_styles = comparison["all_styles"]
     
     # Header
@@ -84,15 +108,8 @@ def generate_comparison_matrix(comparison: dict[str, Any]) -> str:
     for style in all_styles:
         row = [style]
         for proj in projects:
-            proj_styles = comparison["projects"][proj]["styles"]
-            # Find confidence for this style
-            style_details = comparison["projects"][proj]["style_details"]
-            confidence = next(
-                (s["confidence"] for s in style_details if s["style"] == style),
-                0
-            )
-            if style in proj_styles:
-                row.append(f"✅ {confidence:.0%}")
+            if style in style_sets[proj]:
+                row.append(f"✅ {confidences[proj].get(style, 0):.0%}")
             else:
                 row.append("❌")
         lines.append("| " + " | ".join(row) + " |")
@@ -113,8 +130,7 @@ def generate_comparison_matrix(comparison: dict[str, Any]) -> str:
     for pattern in all_patterns:
         row = [pattern]
         for proj in projects:
-            proj_patterns = comparison["projects"][proj]["design_patterns"]
-            if pattern in proj_patterns:
+            if pattern in pattern_sets[proj]:
                 row.append("✅")
             else:
                 row.append("❌")
@@ -127,9 +143,7 @@ def generate_comparison_matrix(comparison: dict[str, Any]) -> str:
     ])
     
     # Communication patterns
-    all_comm = set()
-    for proj_data in comparison["projects"].values():
-        all_comm.update(proj_data["communication"])
+    all_comm = set().union(*comm_sets.values())
     
     header = "| Pattern | " + " | ".join(projects) + " |"
     separator = "|" + "|".join(["---"] * (len(projects) + 1)) + "|"
@@ -138,8 +152,7 @@ def generate_comparison_matrix(comparison: dict[str, Any]) -> str:
     for pattern in sorted(all_comm):
         row = [pattern]
         for proj in projects:
-            proj_comm = comparison["projects"][proj]["communication"]
-            if pattern in proj_comm:
+            if pattern in comm_sets[proj]:
                 row.append("✅")
             else:
                 row.append("❌")
@@ -153,7 +166,7 @@ def generate_comparison_matrix(comparison: dict[str, Any]) -> str:
         "|---------|--------|---------------|--------------|",
     ])
     
-    for proj, data in comparison["projects"].items():
+    for proj, data in project_data.items():
         primary_style = data["styles"][0] if data["styles"] else "N/A"
         key_patterns = ", ".join(data["design_patterns"][:3]) or "N/A"
         lines.append(f"| {proj} | {data['crate_count']} | {primary_style} | {key_patterns} |")
@@ -170,4 +183,4 @@ def generate_handbook_page(project_paths: list[Path], output_path: Path) -> None
     """
     comparison = compare_patterns(project_paths)
     markdown = generate_comparison_matrix(comparison)
-    output_path.write_text(markdown)
+    output_path.write_bytes(markdown.encode("utf-8"))
@@ -4,7 +4,15 @@ import re
 from pathlib import Path
 from typing import Any
 
-from .architecture import _iter_source_files
+from ._source_walk import normalize_newlines
+from .architecture import SourceCache
+
+# Aho-Corasick is optional - it finds every needle in one pass over the code
+try:
+    import ahocorasick_rs
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 
 # Pattern signatures to look for - improved to reduce false positives
@@ -58,20 +66,89 @@ PATTERN_SIGNATURES = {
 }
 
 
-def analyze(project_path: Path) -> list[dict[str, Any]]:
+# The "patterns" regexes of each signature, compiled once
+_COMPILED_PATTERNS = {
+    pattern_name: [re.compile(pat) for pat in signatures.get("patterns", [])]
+    for pattern_name, signatures in PATTERN_SIGNATURES.items()
+}
+
+
+# Every substring analyze() looks for in the code: keywords, traits and
+# `use <import>` statements, deduplicated in signature order
+_CODE_NEEDLES = list(dict.fromkeys(
+    needle
+    for signatures in PATTERN_SIGNATURES.values()
+    for needle in (
+        *signatures.get("keywords", []),
+        *signatures.get("traits", []),
+        *(f"use {imp}" for imp in signatures.get("imports", [])),
+    )
+))
+
+_CODE_AUTOMATON = ahocorasick_rs.AhoCorasick(_CODE_NEEDLES) if AHOCORASICK_AVAILABLE else None
+
+
+def _scan_sources(cache: SourceCache) -> tuple[set[str], set[re.Pattern]]:
+    """Find the needles and signature regexes that occur in the sources.
+    
+    Files are scanned one at a time, so no concatenated copy of the whole
+    codebase is built. A regex is no longer tried once it has matched.
+    
+    Returns:
+        (found `_CODE_NEEDLES`, matched `_COMPILED_PATTERNS` entries)
+    """
+    found: set[str] = set()
+    matched: set[re.Pattern] = set()
+    remaining = [pat for pats in _COMPILED_PATTERNS.values() for pat in pats]
+    
+    for content in cache.contents.values():
+        try:
+            code = normalize_newlines(content).decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+        
+        _find_needles(code, found)
+        if remaining:
+            hits = [pat for pat in remaining if pat.search(code)]
+            if hits:
+                matched.update(hits)
+                remaining = [pat for pat in remaining if pat not in matched]
+    
+    return found, matched
+
+
+def _find_needles(code: str, found: set[str]) -> None:
+    """Add the `_CODE_NEEDLES` that occur in `code` to `found`.
+    
+    With ahocorasick_rs installed the code is scanned once for all needles
+    (overlapping, so a needle inside another is still found); otherwise
+    each needle not found yet is searched for separately.
+    """
+    if _CODE_AUTOMATON is None:
+        found.update([needle for needle in _CODE_NEEDLES if needle not in found and needle in code])
+        return
+    found.update(
+        _CODE_NEEDLES[index]
+        for index, _, _ in _CODE_AUTOMATON.find_matches_as_indexes(code, overlapping=True)
+    )
+
+
+def analyze(project_path: Path, cache: SourceCache | None = None) -> list[dict[str, Any]]:
     """Detect architectural patterns in a project.
     
     Filters out test/bench/example code to reduce false positives.
+    
+    Args:
+        project_path: Path to the Rust project
+        cache: Pre-read sources to reuse; built on demand if omitted
     """
     detected = []
+    # SourceCache reads the files on a thread pool, so their I/O overlaps
+    if cache is None:
+        cache = SourceCache.build(project_path)
     
-    # Collect production Rust source code (excludes tests/benches/examples)
-    all_code = ""
-    for rs_file in _iter_source_files(project_path, include_tests=False):
-        try:
-            all_code += rs_file.read_text() + "\n"
-        except Exception:
-            continue
+    # Scan production Rust sources (excludes tests/benches/examples)
+    found, matched = _scan_sources(cache)
     
     # Also check Cargo.toml for dependencies
     cargo_toml = project_path / "Cargo.toml"
@@ -93,7 +170,7 @@ def analyze(project_path: Path) -> list[dict[str, Any]]:
         if keywords:
             max_score += len(keywords)
             for kw in keywords:
-                if kw in all_code:
+                if kw in found:
                     evidence.append(f"keyword: {kw}")
                     score += 1
         
@@ -102,17 +179,17 @@ def analyze(project_path: Path) -> list[dict[str, Any]]:
         if imports:
             max_score += len(imports) * 2  # Imports are stronger signal
             for imp in imports:
-                if imp in cargo_content or f"use {imp}" in all_code:
+                if imp in cargo_content or f"use {imp}" in found:
                     evidence.append(f"import: {imp}")
                     score += 2
         
         # Check patterns
-        patterns = signatures.get("patterns", [])
+        patterns = _COMPILED_PATTERNS[pattern_name]
         if patterns:
             max_score += len(patterns)
             for pat in patterns:
-                if re.search(pat, all_code):
-                    evidence.append(f"pattern: {pat[:30]}...")
+                if pat in matched:
+                    evidence.append(f"pattern: {pat.pattern[:30]}...")
                     score += 1
         
         # Check traits
@@ -120,7 +197,7 @@ def analyze(project_path: Path) -> list[dict[str, Any]]:
         if traits:
             max_score += len(traits)
             for trait in traits:
-                if trait in all_code:
+                if trait in found:
                     evidence.append(f"trait: {trait}")
                     score += 1
         
@@ -156,4 +233,4 @@ def export_report(patterns: list[dict[str, Any]], output: Path) -> None:
                 lines.append(f"- {e}")
             lines.append("")
     
-    output.write_text("\n".join(lines))
+    output.write_bytes("\n".join(lines).encode("utf-8"))
@@ -172,17 +172,17 @@ def ai_architecture(path: str, output: str, adrs_only: bool, deployment_only: bo
             
             if adrs_only:
                 task = progress.add_task("Extracting ADRs...", total=None)
-                adrs = await ai_arch.extract_adrs(project_path)
+                await ai_arch.extract_adrs(project_path, output_path=output_path / "inferred_adrs.md")
                 progress.remove_task(task)
-                (output_path / "inferred_adrs.md").write_text(adrs)
                 console.print(f"[green]✓[/green] ADRs saved to: {output_path / 'inferred_adrs.md'}")
                 return
             
             if deployment_only:
                 task = progress.add_task("Analyzing deployment model...", total=None)
-                deployment = await ai_arch.analyze_deployment_model(project_path)
+                await ai_arch.analyze_deployment_model(
+                    project_path, output_path=output_path / "deployment_model.md"
+                )
                 progress.remove_task(task)
-                (output_path / "deployment_model.md").write_text(deployment)
                 console.print(f"[green]✓[/green] Deployment saved to: {output_path / 'deployment_model.md'}")
                 return
             
@@ -54,5 +54,5 @@ async def _analyze_async(path: str, analysis_type: str, output: str | None) -> N
     if output:
         output_path = Path(output)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(result)
+        output_path.write_bytes(result.encode("utf-8"))
         console.print(f"\n[green]✓[/green] Saved to: {output_path}")
@@ -1,6 +1,7 @@
 """Analyze command - Full architecture analysis of a Rust project."""
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -31,10 +32,18 @@ def execute(path: str | None, repo: str | None, output: str) -> None:
         
         console.print(f"[green]✓[/green] Analyzing: {project_path.name}")
         
+        # Dependencies and metrics mostly wait on cargo and tokei, so start
+        # both now; they run alongside each other and the module and pattern
+        # scans, and each step below only collects its result
+        from rust_asr.analysis import dependency, metrics
+        pool = ThreadPoolExecutor(max_workers=2)
+        dep_future = pool.submit(dependency.analyze, project_path)
+        stats_future = pool.submit(metrics.analyze, project_path)
+        pool.shutdown(wait=False)
+        
         # Step 2: Dependency analysis
         task = progress.add_task("Analyzing dependencies...", total=None)
-        from rust_asr.analysis import dependency
-        dep_graph = dependency.analyze(project_path)
+        dep_graph = dep_future.result()
         dep_output = output_path / "dependencies.md"
         dependency.export_mermaid(dep_graph, dep_output)
         progress.remove_task(task)
@@ -51,8 +60,7 @@ def execute(path: str | None, repo: str | None, output: str) -> None:
         
         # Step 4: Metrics
         task = progress.add_task("Collecting metrics...", total=None)
-        from rust_asr.analysis import metrics
-        stats = metrics.analyze(project_path)
+        stats = stats_future.result()
         metrics_output = output_path / "metrics.json"
         metrics.export_json(stats, metrics_output)
         progress.remove_task(task)
@@ -65,8 +65,9 @@ def execute(
     
     # Run comprehensive analysis once
     console.print("\n[dim]Running analysis...[/dim]")
-    analysis = architecture.analyze(project_path, include_dynamic=True)
-    analysis["patterns"] = pattern_analyzer.analyze(project_path)
+    sources = architecture.SourceCache.build(project_path)
+    analysis = architecture.analyze(project_path, include_dynamic=True, cache=sources)
+    analysis["patterns"] = pattern_analyzer.analyze(project_path, sources)
     console.print("[green]✓[/green] Analysis complete")
     
     # AI-enhanced ADRs
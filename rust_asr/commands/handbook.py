@@ -228,10 +228,11 @@ def _write_part4(output_path: Path, champions: list[tuple[str, str]], repos_path
 
 """
         if repo_path.exists():
-            # Run auto-analysis
-            styles = architecture.detect_architecture_style(repo_path)
+            # Run auto-analysis (sources are read once for both detectors)
+            sources = architecture.SourceCache.build(repo_path)
+            styles = architecture.detect_architecture_style(repo_path, sources)
             workspace = architecture.analyze_workspace(repo_path)
-            detected_patterns = patterns.analyze(repo_path)
+            detected_patterns = patterns.analyze(repo_path, sources)
             
             if workspace.get("is_workspace"):
                 content += f"**Workspace:** {workspace.get('package_count', 0)} crates\n\n"
@@ -582,12 +582,13 @@ def export_architecture_docs(
     arch_dir = Path(output_dir) / "01-architecture"
     arch_dir.mkdir(parents=True, exist_ok=True)
     
-    # Run comprehensive analysis
-    analysis = architecture.analyze(project_path, include_dynamic=include_tracing)
+    # Run comprehensive analysis (sources are read once for all detectors)
+    sources = architecture.SourceCache.build(project_path)
+    analysis = architecture.analyze(project_path, include_dynamic=include_tracing, cache=sources)
     
     # Add pattern detection
     if include_patterns:
-        analysis["patterns"] = pattern_analyzer.analyze(project_path)
+        analysis["patterns"] = pattern_analyzer.analyze(project_path, sources)
     
     # Generate files
     files = {}